@@ -34,4 +34,7 @@ def create_app(config_class=os.environ.get("FLASK_CONFIG") or DevelopmentConfig)
         app.register_blueprint(upload_and_display.ud)
         from .main import scrape
         app.register_blueprint(scrape.sc)
+        from .jobs import jobs_cli, start_embedded_workers
+        app.cli.add_command(jobs_cli)
+    start_embedded_workers(app)
     return app
\ No newline at end of file
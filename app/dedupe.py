@@ -0,0 +1,89 @@
+import sqlalchemy as sa
+from app import db
+from app.models import People
+from app.names import strip_diacritics
+
+BATCH_SIZE = 1000
+
+
+def normalise(value) -> str:
+    """Case, accent and whitespace insensitive form of an email or organisation, '' when empty."""
+    return strip_diacritics(" ".join((value or "").split())).casefold()
+
+
+def find_root(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]  # path halving
+        i = parents[i]
+    return i
+
+
+def resolve_duplicates():
+    """
+    Entity resolution over the People table after an upload. Rows are blocked on (name_key, email) and
+    (name_key, organisation): rows sharing either block are the same person, and clusters are joined
+    across blocks, so A~B by email and B~C by organisation puts A, B and C together.
+    The first row of each cluster stays canonical, the others get its id in canonical_id.
+    Returns how many rows were marked as duplicates.
+    """
+    rows = db.session.execute(
+        sa.select(People.id, People.name_key, People.email, People.organization).order_by(People.id)
+    ).all()
+
+    parents = list(range(len(rows)))
+    first_in_block = {}
+    for i, row in enumerate(rows):
+        if not row.name_key:
+            continue
+        for block in (("email", row.name_key, normalise(row.email)),
+                      ("organization", row.name_key, normalise(row.organization))):
+            if not block[2]:
+                continue
+            first = first_in_block.setdefault(block, i)
+            a, b = find_root(parents, i), find_root(parents, first)
+            if a != b:
+                parents[max(a, b)] = min(a, b)  # the earliest row is the root
+
+    updates = []
+    for i, row in enumerate(rows):
+        root = find_root(parents, i)
+        if root != i:
+            updates.append({"id": row.id, "canonical_id": rows[root].id})
+
+    db.session.execute(sa.update(People).where(People.canonical_id.isnot(None)).values(canonical_id=None))
+    for i in range(0, len(updates), BATCH_SIZE):
+        db.session.bulk_update_mappings(People, updates[i:i + BATCH_SIZE])
+    db.session.commit()
+    return len(updates)
+
+
+def duplicates_of(ids) -> dict:
+    """canonical id -> ids of its duplicates, for the given canonical ids."""
+    duplicates = {}
+    ids = list(ids)
+    for i in range(0, len(ids), BATCH_SIZE):
+        rows = db.session.execute(
+            sa.select(People.id, People.canonical_id).where(People.canonical_id.in_(ids[i:i + BATCH_SIZE]))
+        ).all()
+        for row in rows:
+            duplicates.setdefault(row.canonical_id, []).append(row.id)
+    return duplicates
+
+
+def fan_out(updates) -> list:
+    """The update mappings of canonical rows copied to each of their duplicates."""
+    duplicates = duplicates_of(u["id"] for u in updates)
+    return [
+        {**update, "id": duplicate_id}
+        for update in updates
+        for duplicate_id in duplicates.get(update["id"], [])
+    ]
+
+
+def copy_to_duplicates(person, fields):
+    """Copy the fields of a canonical People record to its duplicates (not committed)."""
+    db.session.execute(
+        sa.update(People)
+        .where(People.canonical_id == person.id)
+        .values({field: getattr(person, field) for field in fields})
+    )
@@ -0,0 +1,215 @@
+import json
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import sqlalchemy as sa
+from flask import current_app
+from werkzeug.utils import import_string
+from app import db
+from app.models import Log, LogDetail
+
+KEEPALIVE_SECONDS = 15
+BACKLOG_BATCH_SIZE = 500
+
+
+class LocalBroker:
+    """
+    In-process pub/sub for task progress, the default.
+    Only works when the task runs in the same process as the web server.
+    """
+
+    def __init__(self):
+        self._queues = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, log_id, event):
+        with self._lock:
+            queues = list(self._queues.get(log_id, ()))
+        for q in queues:
+            q.put(event)
+
+    @contextmanager
+    def subscribe(self, log_id):
+        """Yield a next_event(timeout) function, returning None when nothing arrived in time."""
+        q = queue.Queue()
+        with self._lock:
+            self._queues[log_id].add(q)
+
+        def next_event(timeout):
+            try:
+                return q.get(timeout=timeout)
+            except queue.Empty:
+                return None
+
+        try:
+            yield next_event
+        finally:
+            with self._lock:
+                self._queues[log_id].discard(q)
+                if not self._queues[log_id]:
+                    del self._queues[log_id]
+
+
+class DatabaseBroker:
+    """
+    Broker for multi-process deployments (e.g. several web workers or a separate job worker).
+    publish() is a no-op because progress already lives in the Log / LogDetail tables;
+    each subscriber polls them for rows newer than its cursor.
+    """
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+
+    def publish(self, log_id, event):
+        pass
+
+    @contextmanager
+    def subscribe(self, log_id):
+        cursor = db.session.scalar(
+            sa.select(sa.func.max(LogDetail.id)).where(LogDetail.log_id == log_id)
+        ) or 0
+        db.session.commit()  # don't hold a read transaction open between polls
+        pending = deque()
+        last_progress = None
+
+        def next_event(timeout):
+            nonlocal cursor, last_progress
+            deadline = time.monotonic() + timeout
+            while not pending and time.monotonic() < deadline:
+                time.sleep(min(self.interval, max(deadline - time.monotonic(), 0)))
+                details = read_details(log_id, cursor)
+                pending.extend(detail_event(d) for d in details)
+                if details:
+                    cursor = details[-1]["id"]
+                log = db.session.get(Log, log_id)
+                db.session.refresh(log)
+                progress = progress_event(log)
+                if progress != last_progress:
+                    pending.append(progress)
+                    last_progress = progress
+                if log.status != "in progress" and len(details) < BACKLOG_BATCH_SIZE:
+                    pending.append(status_event(log))  # only once every detail has been read
+                db.session.commit()
+            return pending.popleft() if pending else None
+
+        yield next_event
+
+
+BROKERS = {
+    "local": LocalBroker,
+    "database": DatabaseBroker,
+}
+
+
+def get_broker():
+    """Broker named by the PROGRESS_BROKER config ("local", "database" or a dotted import path)."""
+    extensions = current_app.extensions
+    broker = extensions.get("progress_broker")
+    if broker is None:
+        name = current_app.config.get("PROGRESS_BROKER") or "local"
+        broker_class = BROKERS.get(name) or import_string(name)
+        broker = extensions.setdefault("progress_broker", broker_class())
+    return broker
+
+
+def detail_event(detail):
+    return {"type": "detail", "data": detail}
+
+
+def progress_event(log):
+    return {"type": "progress", "data": {
+        "total": log.total,
+        "completed": log.success_count + log.error_count,
+        "success": log.success_count,
+        "error": log.error_count,
+    }}
+
+
+def status_event(log):
+    return {"type": "status", "data": {"status": log.status, "log_result": log.result}}
+
+
+def read_details(log_id, after_id, limit=BACKLOG_BATCH_SIZE):
+    rows = db.session.execute(
+        sa.select(LogDetail.id, LogDetail.record_name, LogDetail.status, LogDetail.source, LogDetail.detail)
+        .where(LogDetail.log_id == log_id, LogDetail.id > after_id)
+        .order_by(LogDetail.id)
+        .limit(limit)
+    ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def publish_details(log_id, details):
+    """Push newly committed LogDetail rows (dicts including their id) and the new counters."""
+    broker = get_broker()
+    for detail in details:
+        broker.publish(log_id, detail_event(detail))
+    publish_progress(log_id)
+
+
+def publish_progress(log_id):
+    log = db.session.get(Log, log_id)
+    if log:
+        db.session.refresh(log)
+        get_broker().publish(log_id, progress_event(log))
+
+
+def publish_status(log_id):
+    """
+    Push the status of a task. Subscribers close their stream once it is no longer "in progress",
+    an "in progress" status (a job being retried) only updates what they show.
+    """
+    log = db.session.get(Log, log_id)
+    if log:
+        db.session.refresh(log)
+        get_broker().publish(log_id, progress_event(log))
+        get_broker().publish(log_id, status_event(log))
+
+
+def format_sse(event):
+    message = ""
+    if event["type"] == "detail":
+        message += f"id: {event['data']['id']}\n"  # lets EventSource resume with Last-Event-ID
+    return message + f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def stream_log_events(log_id, after_id=0):
+    """
+    Server-Sent Events for one task: the backlog after `after_id` first, then live events
+    from the broker until the task finishes.
+    """
+    broker = get_broker()
+    # Subscribe before reading the backlog so nothing published in between is lost
+    with broker.subscribe(log_id) as next_event:
+        last_id = after_id
+        while True:
+            details = read_details(log_id, last_id)
+            for detail in details:
+                yield format_sse(detail_event(detail))
+            if len(details) < BACKLOG_BATCH_SIZE:
+                break
+            last_id = details[-1]["id"]
+        if details:
+            last_id = details[-1]["id"]
+
+        log = db.session.get(Log, log_id)
+        db.session.refresh(log)
+        progress, status = progress_event(log), status_event(log)
+        db.session.commit()  # end the read transaction, the stream can stay open for a long time
+        yield format_sse(progress)
+        if status["data"]["status"] != "in progress":
+            yield format_sse(status)
+            return
+
+        while True:
+            event = next_event(KEEPALIVE_SECONDS)
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            if event["type"] == "detail" and event["data"]["id"] <= last_id:
+                continue  # already sent with the backlog
+            yield format_sse(event)
+            if event["type"] == "status" and event["data"]["status"] != "in progress":
+                return
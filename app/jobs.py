@@ -0,0 +1,304 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+from app.models import Job, Log
+from app.events import publish_status
+
+# source -> handler(app, job, checkpoint), registered by the blueprints
+HANDLERS = {}
+
+
+def register_handler(source, handler):
+    """
+    handler(app, job, checkpoint) runs one job inside an app context.
+    It should skip People records with id <= job.checkpoint and call checkpoint(record_id)
+    after each committed record or batch so an interrupted job can resume.
+    """
+    HANDLERS[source] = handler
+
+
+def make_dedup_key(source, params):
+    return f"{source}:{json.dumps(params or {}, sort_keys=True)}"
+
+
+def enqueue_job(source, params=None, user_email=None):
+    """
+    Queue a job and its Log. If an identical job is still pending it is returned instead.
+    """
+    dedup_key = make_dedup_key(source, params)
+    existing = db.session.scalar(
+        sa.select(Job).where(Job.dedup_key == dedup_key, Job.status == "pending").order_by(Job.id)
+    )
+    if existing:
+        return existing
+
+    log = Log(status="in progress", result="Queued")
+    db.session.add(log)
+    db.session.flush()
+    job = Job(log_id=log.id, user_email=user_email, source=source, params=params or {},
+              status="pending", dedup_key=dedup_key)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def source_limit(source):
+    limits = current_app.config.get("JOB_SOURCE_LIMITS") or {}
+    return limits.get(source, 1)
+
+
+def running_count(source):
+    return db.session.scalar(
+        sa.select(sa.func.count(Job.id)).where(Job.source == source, Job.status == "running")
+    )
+
+
+def claim_job(worker):
+    """Atomically move the oldest runnable pending job to running. Returns None if there is none."""
+    pending = db.session.execute(
+        sa.select(Job.id, Job.source).where(Job.status == "pending").order_by(Job.id)
+    ).all()
+    full = set()
+    for job_id, source in pending:
+        if source in full:
+            continue
+        if running_count(source) >= source_limit(source):
+            full.add(source)
+            continue
+
+        now = datetime.now()
+        claimed = db.session.execute(
+            sa.update(Job)
+            .where(Job.id == job_id, Job.status == "pending")
+            .values(status="running", worker=worker, attempts=Job.attempts + 1,
+                    started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            continue  # taken by another worker
+
+        # Another process may have claimed a job of the same source at the same time
+        if running_count(source) > source_limit(source):
+            db.session.execute(
+                sa.update(Job).where(Job.id == job_id)
+                .values(status="pending", worker=None, attempts=Job.attempts - 1)
+            )
+            db.session.commit()
+            full.add(source)
+            continue
+        return db.session.get(Job, job_id)
+    db.session.commit()
+    return None
+
+
+def save_checkpoint(job_id, record_id):
+    db.session.execute(
+        sa.update(Job).where(Job.id == job_id)
+        .values(checkpoint=record_id, heartbeat_at=datetime.now())
+    )
+    db.session.commit()
+
+
+def requeue_stale_jobs():
+    """Running jobs whose worker stopped heartbeating go back to pending (resuming from their checkpoint)."""
+    timeout = current_app.config.get("JOB_HEARTBEAT_TIMEOUT", 60)
+    max_attempts = current_app.config.get("JOB_MAX_ATTEMPTS", 3)
+    stale = db.session.scalars(
+        sa.select(Job).where(
+            Job.status == "running",
+            Job.heartbeat_at < datetime.now() - timedelta(seconds=timeout)
+        )
+    ).all()
+    for job in stale:
+        if job.attempts >= max_attempts:
+            job.status = "error"
+            job.error = f"Interrupted {job.attempts} times"
+            job.finished_at = datetime.now()
+            log = db.session.get(Log, job.log_id)
+            log.status = "error"
+            log.result = job.error
+            print(f"Job {job.id} failed: {job.error}")
+        else:
+            job.status = "pending"
+            job.worker = None
+            print(f"Job {job.id} interrupted, resuming after record {job.checkpoint}")
+    db.session.commit()
+    for job in stale:
+        if job.status == "error":
+            publish_status(job.log_id)
+
+
+def run_job(app, job):
+    handler = HANDLERS.get(job.source)
+    if not handler:
+        job.status = "error"
+        job.error = f"Invalid source {job.source}"
+        job.finished_at = datetime.now()
+        db.session.commit()
+        return
+
+    try:
+        handler(app, job, lambda record_id: save_checkpoint(job.id, record_id))
+    except Exception as e:
+        print(f"Job {job.id} failed: {e}")
+        db.session.rollback()
+        db.session.refresh(job)  # keep the checkpoint saved before the failure
+        log = db.session.get(Log, job.log_id)
+        if job.attempts < app.config.get("JOB_MAX_ATTEMPTS", 3):
+            job.status = "pending"  # retried from the last checkpoint
+            job.worker = None
+            log.status = "in progress"
+            log.result = f"Retrying after record {job.checkpoint}: {e}"[:128]
+        else:
+            job.status = "error"
+            job.finished_at = datetime.now()
+            log.status = "error"
+            log.result = str(e)[:128]
+        job.error = str(e)[:256]
+        db.session.commit()
+        # An "in progress" status keeps subscribers listening for the retry, "error" ends their stream
+        publish_status(job.log_id)
+        return
+
+    # Handlers that stop without raising (e.g. nothing to update) mark their Log as failed
+    log = db.session.get(Log, job.log_id)
+    db.session.refresh(log)
+    if log.status == "error":
+        job.status = "error"
+        job.error = (log.result or "")[:256]
+    else:
+        job.status = "completed"
+    job.finished_at = datetime.now()
+    db.session.commit()
+
+
+class WorkerPool:
+    """
+    Fixed number of worker threads that claim and run jobs from the job table.
+    Runs inside the web process (JOB_EMBEDDED_WORKER) or on its own with `flask jobs worker`.
+    """
+
+    def __init__(self, app, size=None, poll_interval=None):
+        self.app = app
+        self.size = size or app.config.get("JOB_WORKERS", 2)
+        self.poll_interval = poll_interval or app.config.get("JOB_POLL_INTERVAL", 2)
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.running = set()  # ids of jobs being run by this pool
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.threads = []
+
+    def start(self, daemon=True):
+        with self.app.app_context():
+            requeue_stale_jobs()
+        for i in range(self.size):
+            thread = threading.Thread(target=self.work, args=(f"{self.name}#{i}",), daemon=daemon)
+            thread.start()
+            self.threads.append(thread)
+        heartbeat = threading.Thread(target=self.heartbeat, daemon=daemon)
+        heartbeat.start()
+        self.threads.append(heartbeat)
+        print(f"Started {self.size} job workers ({self.name})")
+
+    def stop(self):
+        self.stopped.set()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def work(self, worker):
+        while not self.stopped.is_set():
+            with self.app.app_context():
+                try:
+                    requeue_stale_jobs()
+                    job = claim_job(worker)
+                    if job:
+                        with self.lock:
+                            self.running.add(job.id)
+                        try:
+                            print(f"{worker} running job {job.id} ({job.source})")
+                            run_job(self.app, job)
+                        finally:
+                            with self.lock:
+                                self.running.discard(job.id)
+                        continue
+                except Exception as e:
+                    print(f"Job worker error: {e}")
+                    db.session.rollback()
+            self.stopped.wait(self.poll_interval)
+
+    def heartbeat(self):
+        """Keep heartbeat_at fresh for running jobs, including long steps that do not checkpoint."""
+        interval = self.app.config.get("JOB_HEARTBEAT_INTERVAL", 10)
+        while not self.stopped.wait(interval):
+            with self.lock:
+                job_ids = list(self.running)
+            if not job_ids:
+                continue
+            with self.app.app_context():
+                try:
+                    db.session.execute(
+                        sa.update(Job).where(Job.id.in_(job_ids)).values(heartbeat_at=datetime.now())
+                    )
+                    db.session.commit()
+                except Exception as e:
+                    print(f"Job heartbeat error: {e}")
+                    db.session.rollback()
+
+
+_embedded_pool_lock = threading.Lock()
+
+
+def ensure_embedded_workers(app):
+    """Start the in-process worker pool once, unless a separate worker process is used."""
+    if not app.config.get("JOB_EMBEDDED_WORKER", True) or app.testing:
+        return
+    with _embedded_pool_lock:
+        if "job_pool" not in app.extensions:
+            pool = WorkerPool(app)
+            pool.start()
+            app.extensions["job_pool"] = pool
+
+
+def serves_requests(app):
+    """
+    False where the app is created but never serves requests: CLI commands other than `flask run`
+    (migrations, `flask jobs worker`) and the debug reloader's watcher process.
+    """
+    command = click.get_current_context(silent=True)
+    if command is not None and command.info_name != "run":
+        return False
+    return not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+def start_embedded_workers(app):
+    """Called by create_app, so jobs queued or interrupted before a restart resume without a new request."""
+    if serves_requests(app):
+        ensure_embedded_workers(app)
+
+
+jobs_cli = AppGroup("jobs", help="Update job queue.")
+
+
+@jobs_cli.command("worker")
+@click.option("--workers", "-n", type=int, default=None, help="Number of worker threads (default JOB_WORKERS).")
+def worker_command(workers):
+    """Run a job worker pool in the foreground."""
+    pool = WorkerPool(current_app._get_current_object(), size=workers)
+    pool.start(daemon=True)
+    try:
+        while any(t.is_alive() for t in pool.threads):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping job workers, running jobs resume on the next start")
+        pool.stop()
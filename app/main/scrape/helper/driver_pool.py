@@ -0,0 +1,244 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from linkedin_scraper import actions
+from app.proxies import get_proxy_pool
+from app.ratelimit import TokenBucket
+from .profile_url_scrape import init_driver, load_cookies, save_cookies
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 200       # pages loaded before a browser is restarted
+DEFAULT_MAX_MEMORY_MB = 512   # JS heap of the current page before a browser is restarted
+BORROW_TIMEOUT = 600          # seconds to wait for a free browser
+DEFAULT_PAGES_PER_MINUTE = 6  # page budget of each session
+DEFAULT_PAGE_BURST = 2
+
+
+class DriverSession:
+    """
+    One logged-in Chrome kept by a DriverPool. Each session slot has its own cookie jar
+    and its own page budget, so sessions are paced independently of each other.
+    """
+
+    def __init__(self, driver, slot, cookies_file, bucket, proxy=None):
+        self.driver = driver
+        self.slot = slot
+        self.proxy = proxy
+        self.cookies_file = cookies_file
+        self.bucket = bucket
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+    def get(self, url):
+        """Navigate once the session's budget allows and count the page towards the recycle threshold."""
+        self.wait_for_budget()
+        self.pages += 1
+        self.driver.get(url)
+
+    def wait_for_budget(self):
+        """Call before loading a page with other code (e.g. Person), then count_page()."""
+        self.bucket.take()
+
+    def count_page(self, n=1):
+        self.pages += n
+
+    def is_logged_out(self):
+        url = self.driver.current_url.lower()
+        return "login" in url or "authwall" in url
+
+    def memory_mb(self):
+        try:
+            used = self.driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0"
+            )
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"Error closing browser: {e}")
+
+
+class DriverPool:
+    """
+    Keeps up to `size` warm, logged-in Chrome sessions for LinkedIn.
+    borrow() hands out a healthy session and takes it back afterwards, a session is restarted
+    once it has loaded max_pages pages or its page uses more than max_memory_mb.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+                 cookies_file="my_linkedin_cookies.json", headless=False,
+                 pages_per_minute=DEFAULT_PAGES_PER_MINUTE, page_burst=DEFAULT_PAGE_BURST, proxies=None):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.cookies_file = cookies_file
+        self.headless = headless
+        self.proxies = proxies  # ProxyPool choosing each new browser's exit, None for direct
+        self.idle = queue.LifoQueue()  # most recently used first, its page is most likely still warm
+        self.free_slots = queue.SimpleQueue()
+        for slot in range(size):
+            self.free_slots.put(slot)
+        # Budgets belong to the slot, a restarted browser keeps the pacing of the one it replaces
+        self.buckets = [TokenBucket(pages_per_minute / 60, page_burst) for _ in range(size)]
+        self.started = 0
+        self.lock = threading.Lock()
+
+    def cookies_file_for(self, slot):
+        """Slot 0 uses cookies_file itself, other slots get their own jar next to it."""
+        if slot == 0:
+            return self.cookies_file
+        base, ext = os.path.splitext(self.cookies_file)
+        return f"{base}_{slot}{ext}"
+
+    def start_session(self, slot):
+        """Start a browser and log it in, with the slot's saved cookies when possible."""
+        proxy = self.proxies.choose() if self.proxies else None
+        session = DriverSession(init_driver(headless=self.headless, proxy=proxy), slot,
+                                self.cookies_file_for(slot), self.buckets[slot], proxy)
+        try:
+            session.get("https://www.linkedin.com/")
+            if load_cookies(session.driver, session.cookies_file):
+                print("🔑 Cookies loaded.")
+            session.get("https://www.linkedin.com/feed/")
+            if session.is_logged_out():
+                self.login(session)
+            else:
+                print("✅ Already logged in with cookies.")
+        except Exception:
+            session.quit()
+            if proxy:
+                self.proxies.report(proxy, ok=False)
+            raise
+        return session
+
+    def login(self, session):
+        print("⚠️ Not logged in. Logging in...")
+        actions.login(session.driver, os.getenv("LINKEDIN_EMAIL"), os.getenv("LINKEDIN_PASSWORD"))
+        save_cookies(session.driver, session.cookies_file)
+        print("✅ Logged in and cookies saved.")
+
+    def is_healthy(self, session):
+        try:
+            session.driver.execute_script("return document.readyState")
+            if session.is_logged_out():
+                self.login(session)
+            return True
+        except Exception as e:
+            print(f"Browser session is unhealthy, restarting it: {e}")
+            return False
+
+    def is_worn_out(self, session):
+        return session.pages >= self.max_pages or session.memory_mb() >= self.max_memory_mb
+
+    def discard(self, session, failed=False):
+        session.quit()
+        if failed and session.proxy:
+            self.proxies.report(session.proxy, ok=False)
+        with self.lock:
+            self.started -= 1
+        self.free_slots.put(session.slot)
+
+    def acquire(self, timeout=BORROW_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                session = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    can_start = self.started < self.size
+                    if can_start:
+                        self.started += 1
+                if can_start:
+                    slot = self.free_slots.get()
+                    try:
+                        return self.start_session(slot)
+                    except Exception:
+                        with self.lock:
+                            self.started -= 1
+                        self.free_slots.put(slot)
+                        raise
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("No browser session available")
+                try:
+                    session = self.idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError("No browser session available")
+
+            if self.is_healthy(session):
+                return session
+            self.discard(session, failed=True)
+
+    def release(self, session):
+        if self.is_worn_out(session):
+            print(f"Recycling browser after {session.pages} pages")
+            self.discard(session)
+        else:
+            self.idle.put(session)
+
+    @contextmanager
+    def borrow(self, timeout=BORROW_TIMEOUT):
+        session = self.acquire(timeout)
+        try:
+            yield session
+        except Exception:
+            # The page may be in any state, don't hand it out again
+            self.discard(session)
+            raise
+        else:
+            self.release(session)
+
+    def warm(self, n=None):
+        """
+        Start up to n sessions (default the pool size) in the background, all at once, so the
+        first borrows find a logged-in browser instead of each waiting for one. Returns the threads.
+        """
+        def start():
+            try:
+                self.release(self.acquire())
+            except Exception as e:
+                print(f"Could not warm a browser session: {e}")
+
+        with self.lock:
+            missing = min(n or self.size, self.size) - self.started
+        threads = [threading.Thread(target=start, daemon=True) for _ in range(max(missing, 0))]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def close(self):
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """
+    The process-wide LinkedIn browser pool, configured by DRIVER_POOL_SIZE, DRIVER_MAX_PAGES,
+    DRIVER_MAX_MEMORY_MB and DRIVER_PAGES_PER_MINUTE / DRIVER_PAGE_BURST (the budget of each session).
+    New browsers are launched through the proxy pool when PROXY_ROTATION is set.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool(
+                size=int(os.getenv("DRIVER_POOL_SIZE") or DEFAULT_POOL_SIZE),
+                max_pages=int(os.getenv("DRIVER_MAX_PAGES") or DEFAULT_MAX_PAGES),
+                max_memory_mb=int(os.getenv("DRIVER_MAX_MEMORY_MB") or DEFAULT_MAX_MEMORY_MB),
+                pages_per_minute=float(os.getenv("DRIVER_PAGES_PER_MINUTE") or DEFAULT_PAGES_PER_MINUTE),
+                page_burst=int(os.getenv("DRIVER_PAGE_BURST") or DEFAULT_PAGE_BURST),
+                proxies=get_proxy_pool(),
+            )
+        return _pool
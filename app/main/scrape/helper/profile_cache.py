@@ -0,0 +1,99 @@
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, unquote
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from app import db
+from app.models import LinkedInProfile
+
+CACHED_FIELDS = ["company", "position", "location", "email"]
+BATCH_SIZE = 500
+
+
+class CacheReport:
+    """Profile and search cache hits and misses of one job."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.search_hits = 0
+        self.search_misses = 0
+        self.lock = threading.Lock()
+
+    def record(self, hits=0, misses=0):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def record_searches(self, hits=0, misses=0):
+        with self.lock:
+            self.search_hits += hits
+            self.search_misses += misses
+
+    def summary(self):
+        # Short enough for Log.result next to the success and failure counts
+        return (f"Cache hits: {self.hits}/{self.hits + self.misses} profiles, "
+                f"{self.search_hits}/{self.search_hits + self.search_misses} searches.")
+
+
+def canonical_profile_url(url):
+    """
+    The one URL a profile is cached under: https://www.linkedin.com/in/<slug>, whatever the
+    country subdomain, query string, trailing slash or case. None for URLs that are not profiles.
+    """
+    if not url:
+        return None
+    parsed = urlparse(url.strip() if "://" in url else f"https://{url.strip()}")
+    host = parsed.netloc.lower()
+    parts = [p for p in parsed.path.split("/") if p]
+    if not host.endswith("linkedin.com") or len(parts) < 2 or parts[0].lower() != "in":
+        return None
+    return f"https://www.linkedin.com/in/{unquote(parts[1]).lower()}"
+
+
+def has_profile_data(info):
+    """False for a page where every field failed to scrape (e.g. a half-loaded or blocked page)."""
+    return any(info.get(field) for field in CACHED_FIELDS)
+
+
+def profile_ttl():
+    return timedelta(days=current_app.config.get("LINKEDIN_PROFILE_TTL_DAYS", 30))
+
+
+def cached_profiles(urls):
+    """{canonical url: info} of the profiles scraped within the TTL. Needs an app context."""
+    urls = list({u for u in map(canonical_profile_url, urls) if u})
+    cutoff = datetime.now() - profile_ttl()
+    found = {}
+    for i in range(0, len(urls), BATCH_SIZE):
+        rows = db.session.scalars(
+            sa.select(LinkedInProfile)
+            .where(LinkedInProfile.url.in_(urls[i:i + BATCH_SIZE]), LinkedInProfile.fetched_at >= cutoff)
+        ).all()
+        for row in rows:
+            info = {field: getattr(row, field) or "" for field in CACHED_FIELDS}
+            if has_profile_data(info):
+                found[row.url] = info
+    return found
+
+
+def store_profile(url, info):
+    """Save a scraped profile, replacing an expired copy. Empty results are not cached. Needs an app context."""
+    url = canonical_profile_url(url)
+    if not url or not has_profile_data(info):
+        return
+    values = {field: (info.get(field) or "")[:128] for field in CACHED_FIELDS}
+    try:
+        with db.session.begin_nested():  # a clash with another job only undoes this row
+            row = db.session.scalar(sa.select(LinkedInProfile).where(LinkedInProfile.url == url))
+            if row is None:
+                db.session.add(LinkedInProfile(url=url, fetched_at=datetime.now(), **values))
+            else:
+                for field, value in values.items():
+                    setattr(row, field, value)
+                row.fetched_at = datetime.now()
+    except IntegrityError:
+        print(f"Profile {url} was cached by another job")
+    db.session.commit()
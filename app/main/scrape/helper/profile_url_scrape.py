@@ -16,7 +16,6 @@ import random
 import undetected_chromedriver as uc
 import re
 from urllib.parse import urlparse, urlunparse
-from linkedin_scraper import actions
 
 
 def save_cookies(driver, filename="my_linkedin_cookies.json"):
@@ -54,100 +53,86 @@ def load_cookies(driver, filename="my_linkedin_cookies.json"):
         print(f"Cookie file {filename} not found. Need to login first.")
         return False
 
-def init_driver(headless=False):
-    """Safe Chrome init"""
+def init_driver(headless=False, proxy=None):
+    """Safe Chrome init, through `proxy` (a Proxy from app.proxies) when given"""
     options = uc.ChromeOptions()
     if headless:
         options.add_argument("--headless=new")
+    if proxy:
+        options.add_argument(f"--proxy-server={proxy.url}")
     options.add_argument("--disable-blink-features=AutomationControlled")
     driver = uc.Chrome(options=options)
     return driver
 
-def scrape_linkedin_people_search(names, cookies_file="my_linkedin_cookies.json"):
+def scrape_linkedin_people_search(names, pool=None, not_found=None):
     """
-    Enhanced LinkedIn scraper with cookie handling:
-    - Saves cookies after first login and reuses them for subsequent sessions
-    - Only logs in once per session, then uses cookies for remaining requests
-    - Handles multiple names by looping through them
-    - Saves separate HTML files for each name's search outcome
-    - Uses proxy rotation every 3 names
+    LinkedIn people search for each name, returns {name: profile_url}:
+    - Borrows a warm, logged-in browser from the driver pool for every batch of names
+    - Re-logs in if a search is redirected to the login page or authwall
+    - Only the first profile link of each search is kept
+    - Names whose search loaded but listed no profile are added to the `not_found` set, if given
     """
+    from .driver_pool import get_driver_pool
+
+    pool = pool or get_driver_pool()
     batch_size = 20
-    first_batch = True
     results = {}
 
-    email = os.getenv("LINKEDIN_EMAIL")
-    password = os.getenv("LINKEDIN_PASSWORD")
-
     for i in range(0, len(names), batch_size):
         batch_names = names[i:i + batch_size]
 
-        driver = init_driver(headless=False)
         try:
-            driver.get("https://www.linkedin.com/")
-
-            # Load cookies if available
-            if load_cookies(driver, cookies_file):
-                driver.refresh()
-                print("🔑 Cookies loaded.")
-            else:
-                print("No cookies found, logging in...")
-                actions.login(driver, email, password)
-                save_cookies(driver, cookies_file)
-                print("✅ Logged in and cookies saved.")
-
-            first_batch = False
-
-            for j, name in enumerate(batch_names):
-                print(f"\n👤 Scraping {j+1}/{len(batch_names)}: {name}")
-                encoded_name = name.replace(" ", "%20")
-                search_url = f"https://www.linkedin.com/search/results/people/?keywords={encoded_name}"
-
-                try:
-                    driver.get(search_url)
-                    time.sleep(random.uniform(5, 10))
-
-                    WebDriverWait(driver, 1).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-
-                    # Check if redirected to login/authwall
-                    if "login" in driver.current_url.lower() or "authwall" in driver.current_url.lower():
-                        print("⚠️ Redirected to login/authwall, re-logging in...")
-                        actions.login(driver, email, password)
-                        save_cookies(driver, cookies_file)
-                        driver.get(search_url)
-                        time.sleep(5)
-
-                    # Extract first LinkedIn profile link
-                    links = driver.find_elements(By.TAG_NAME, "a")
-                    found = False
-                    for link in links:
-                        href = link.get_attribute("href")
-                        if href and "linkedin.com/in/" in href:
-                            clean_url = urlunparse(urlparse(href)._replace(query=''))
-                            print(f"✅ Found URL for {name}: {clean_url}")
-                            results[name] = clean_url
-                            found = True
-                            break
-                    if not found:
-                        print(f"⚠️ No LinkedIn profile link found for {name}")
-
-                    # Random delay between searches
-                    if j < len(batch_names) - 1:
-                        time.sleep(random.uniform(1, 3))
-
-                except Exception as scrape_error:
-                    print(f"❌ Error scraping {name}: {scrape_error}")
+            with pool.borrow() as session:
+                driver = session.driver
+                for j, name in enumerate(batch_names):
+                    print(f"\n👤 Scraping {j+1}/{len(batch_names)}: {name}")
+                    encoded_name = name.replace(" ", "%20")
+                    search_url = f"https://www.linkedin.com/search/results/people/?keywords={encoded_name}"
+
+                    try:
+                        session.get(search_url)
+                        time.sleep(random.uniform(5, 10))
+
+                        WebDriverWait(driver, 1).until(
+                            EC.presence_of_element_located((By.TAG_NAME, "body"))
+                        )
+
+                        # Check if redirected to login/authwall
+                        if session.is_logged_out():
+                            print("⚠️ Redirected to login/authwall, re-logging in...")
+                            pool.login(session)
+                            session.get(search_url)
+                            time.sleep(5)
+
+                        # Extract first LinkedIn profile link
+                        links = driver.find_elements(By.TAG_NAME, "a")
+                        found = False
+                        for link in links:
+                            href = link.get_attribute("href")
+                            if href and "linkedin.com/in/" in href:
+                                clean_url = urlunparse(urlparse(href)._replace(query=''))
+                                print(f"✅ Found URL for {name}: {clean_url}")
+                                results[name] = clean_url
+                                found = True
+                                break
+                        if not found:
+                            print(f"⚠️ No LinkedIn profile link found for {name}")
+                            if not_found is not None:
+                                not_found.add(name)
+
+                        # Random delay between searches
+                        if j < len(batch_names) - 1:
+                            time.sleep(random.uniform(1, 3))
+
+                    except Exception as scrape_error:
+                        print(f"❌ Error scraping {name}: {scrape_error}")
 
         except Exception as batch_error:
             print(f"❌ Batch error: {batch_error}")
 
         finally:
-            print("Closing browser...")
-            driver.quit()
             if i + batch_size < len(names):
                 time.sleep(random.uniform(3, 7))
             print("Batch completed.\n")
 
-    return results
\ No newline at end of file
+    return results
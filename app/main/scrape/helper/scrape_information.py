@@ -5,21 +5,26 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../..")))
 
 
-import undetected_chromedriver as uc
 import time
 import random
 import json
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from .profile_url_scrape import load_cookies, save_cookies, scrape_linkedin_people_search
+from .search_cache import SearchPlan, search_key
+from .driver_pool import get_driver_pool
+from .profile_cache import CacheReport, cached_profiles, canonical_profile_url, has_profile_data, store_profile
 from app.linkedin_scraper.person import Person
-from linkedin_scraper import actions
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from app import db
-from app.models import People,LogDetail,Log
+from app.models import People,PeopleField,Log
+from app.dedupe import copy_to_duplicates
+from app.provenance import confirmed_since, needs_refresh, record_fields
+from app.progress import set_progress_total, add_log_details
 from app.main.scrape import sc
-import sqlalchemy as sa
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from dotenv import load_dotenv
@@ -41,199 +46,267 @@ def human_delay(min_delay, max_delay):
     print(f"Waiting for {delay_time:.2f} seconds...")
     time.sleep(delay_time)
 
-def ensure_logged_in(driver, cookies_file="my_linkedin_session.json"):
-    """Make sure LinkedIn session is alive."""
-    driver.get("https://www.linkedin.com/feed/")
-    human_delay(3, 5)
-
-    if "login" in driver.current_url or "authwall" in driver.current_url:
-        print("⚠️ Not logged in. Logging in...")
-        actions.login(driver, LINKEDIN_EMAIL, LINKEDIN_PASSWORD)
-        human_delay(5, 8)
-        save_cookies(driver, cookies_file)
-        print("✅ Logged in and cookies saved.")
-    else:
-        print("✅ Already logged in with cookies.")
-
-
-def scrape_profiles(driver, profile_map, cookies_file="my_linkedin_cookies.json"):
-    results_dict = {}
-
-    driver.get("https://www.linkedin.com/")
-    if load_cookies(driver, cookies_file):
-                driver.refresh()
-                print("🔑 Cookies loaded.")
-    else:
-        print("No cookies found, logging in...")
-        actions.login(driver, LINKEDIN_EMAIL, LINKEDIN_PASSWORD)
-        save_cookies(driver, cookies_file)
-        print("✅ Logged in and cookies saved.")
-    ensure_logged_in(driver, cookies_file)
-
-   
-    for name, profile_url in profile_map.items():
-        print(f"Scraping profile for {name}: {profile_url}")
+def scrape_profile(session, pool, name, profile_url):
+    """Scrape one profile with a pooled browser session. Returns the scraped info, or None on failure."""
+    driver = session.driver
+    print(f"Scraping profile for {name}: {profile_url}")
+    try:
+        session.wait_for_budget()
+        person = Person(profile_url, driver=driver, scrape=False, close_on_complete=False)
+        session.count_page()
+        close_alert_if_present(driver)
+        human_delay(4,7)
+
+        if session.is_logged_out():
+            print("⚠️ Hit authwall, retrying login...")
+            pool.login(session)
+            session.get(profile_url)
+            human_delay(4, 6)
         try:
-            person = Person(profile_url, driver=driver, scrape=False, close_on_complete=False)
-            close_alert_if_present(driver)
-            human_delay(4,7)
-
-            if "authwall" in driver.current_url or "login" in driver.current_url:
-                print("⚠️ Hit authwall, retrying login...")
-                ensure_logged_in(driver, cookies_file)
-                driver.get(profile_url)
-                human_delay(4, 6)
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
-                )
-            except Exception as e:
-                print(f"❌ Failed to load profile page for {name}: {e}")
-                continue
-
-            # # Scrape name and location
-            try:
-                person.get_name_and_location()
-                print(f"Name and location scraped for {name}")
-            except Exception as e:
-                print(f"⚠️ Failed to scrape name/location for {name}: {e}")
-                # Continue with empty values
-                person.name = ""
-                person.location = ""
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
+            )
+        except Exception as e:
+            print(f"❌ Failed to load profile page for {name}: {e}")
+            return None
+
+        # # Scrape name and location
+        try:
+            person.get_name_and_location()
+            print(f"Name and location scraped for {name}")
+        except Exception as e:
+            print(f"⚠️ Failed to scrape name/location for {name}: {e}")
+            # Continue with empty values
+            person.name = ""
+            person.location = ""
             
-            # Scrape experiences
-            try:
-                person.get_experiences()
-                print(f"Experiences scraped for {name}")
-            except Exception as e:
-                print(f"⚠️ Failed to scrape experiences for {name}: {e}")
+        # Scrape experiences
+        try:
+            person.get_experiences()
+            print(f"Experiences scraped for {name}")
+        except Exception as e:
+            print(f"⚠️ Failed to scrape experiences for {name}: {e}")
             
-            # Scrape email
-            human_delay(2, 4)
-            try:
-                person.get_email()
-                print(f"Email scraped for {name}")
-            except Exception as e:
-                print(f"⚠️ Failed to scrape email for {name}: {e}")
-                person.email = ""
-
-            # Store results with fallback empty values
-            results_dict[name] = {
-                "company": person.company or "",
-                "position": person.job_title or "",
-                "location": person.location or "",
-                "email": person.email or "",
-                "url": profile_url
-            }
-            print(f"✅ Scraped {name}: {results_dict[name]}")
-            human_delay(2, 5)
+        # Scrape email
+        human_delay(2, 4)
+        try:
+            person.get_email()
+            print(f"Email scraped for {name}")
+        except Exception as e:
+            print(f"⚠️ Failed to scrape email for {name}: {e}")
+            person.email = ""
+
+        # Store results with fallback empty values
+        info = {
+            "company": person.company or "",
+            "position": person.job_title or "",
+            "location": person.location or "",
+            "email": person.email or "",
+            "url": profile_url
+        }
+        print(f"✅ Scraped {name}: {info}")
+        human_delay(2, 5)
+        return info
+    except Exception as e:
+        print(f"❌ Error processing profile for {name}: {e}")
+        return None  # Skip to next profile
+
+def iter_scraped_profiles(profile_map, pool=None, sessions=None, report=None):
+    """
+    Scrape the profiles in {key: profile_url} on up to `sessions` pooled browsers at once
+    (default PROFILE_SESSIONS, else the pool size) and yield (key, info) as each one finishes.
+    Keys are a name or a People id, they are only used to tell the results apart and in messages.
+    Every browser keeps its own page budget, so adding sessions adds throughput, not load per session.
+    Profiles in the profile cache are yielded first without a browser, scraped ones are added to it.
+    Hits and misses are counted in `report` (a CacheReport) when given.
+    """
+    cached = cached_profiles(profile_map.values())
+    misses = {}
+    for name, profile_url in profile_map.items():
+        info = cached.get(canonical_profile_url(profile_url))
+        if info:
+            yield name, {**info, "url": profile_url}
+        else:
+            misses[name] = profile_url
+    if report:
+        report.record(hits=len(profile_map) - len(misses), misses=len(misses))
+    if not misses:
+        return
+
+    pool = pool or get_driver_pool()
+    sessions = min(sessions or int(os.getenv("PROFILE_SESSIONS") or pool.size), len(misses))
+
+    todo = queue.SimpleQueue()
+    for item in misses.items():
+        todo.put(item)
+    results = queue.SimpleQueue()
+    done = object()
+
+    def work():
+        try:
+            with pool.borrow() as session:
+                while True:
+                    try:
+                        name, profile_url = todo.get_nowait()
+                    except queue.Empty:
+                        break
+                    info = scrape_profile(session, pool, name, profile_url)
+                    if info and has_profile_data(info):
+                        results.put((name, info))
+                    elif info:
+                        print(f"⚠️ Nothing could be scraped from the profile of {name}")
         except Exception as e:
-            print(f"❌ Error processing profile for {name}: {e}")
-            continue  # Skip to next profile
+            print(f"❌ Profile session failed: {e}")
+        finally:
+            results.put(done)
+
+    threads = [threading.Thread(target=work, daemon=True) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+
+    running = len(threads)
+    while running:
+        result = results.get()
+        if result is done:
+            running -= 1
+        else:
+            store_profile(result[1]["url"], result[1])
+            yield result
+
+def scrape_profiles(profile_map, pool=None, report=None):
+    """Scrape each profile in {name: profile_url}, returns {name: info} for the profiles that succeeded."""
+    return dict(iter_scraped_profiles(profile_map, pool, report=report))
 
-    return results_dict
+CHECKPOINT_SIZE = 10  # records searched, scraped and saved before each checkpoint
+PROFILE_FIELDS = ["organization", "role", "city", "state", "country", "email"]  # saved from a scraped profile
+LINKEDIN_FIELDS = ["linkedin"] + PROFILE_FIELDS
 
-def scrape_and_update_people(log_id, number=10):
-    people_records = db.session.query(People).limit(number).all()
+def scrape_and_update_people(log_id, number=10, after_id=0, on_checkpoint=None):
+    """
+    Scrape up to `number` People records in id order, skipping ids <= after_id (already done by an
+    earlier run of the same job). on_checkpoint(last_id) is called after every CHECKPOINT_SIZE records.
+    """
     log = db.session.query(Log).filter_by(id=log_id).first()
-    if not people_records:
+    # Duplicates found at upload are not searched, they get their canonical record's results.
+    # Records scraped within LINKEDIN_FRESH_DAYS are skipped
+    canonical = db.session.query(People).filter(
+        People.canonical_id.is_(None),
+        needs_refresh("linkedin", LINKEDIN_FIELDS, log.created_at)
+    )
+    done = canonical.filter(People.id <= after_id).with_entities(People.id).limit(number).count()
+    remaining = canonical.filter(People.id > after_id).order_by(People.id).limit(max(number - done, 0)).all()
+    if not remaining and not done:
         log.result = "No People records found"
         log.status = "error"
         db.session.commit()
         return {"error": "No People records found"}
+    set_progress_total(log_id, done + len(remaining))
 
-    names_to_scrape = [
-        f"{p.first_name} {p.last_name} {p.organization or ''}".strip()
-        for p in people_records 
-        if not p.linkedin
-    ]
-
-    cookies_file = "my_linkedin_cookies.json"
-    if names_to_scrape:
-        scraped_urls = scrape_linkedin_people_search(names_to_scrape, cookies_file)
-        for name, url in scraped_urls.items():
-            parts = name.strip().split()
-            first_name = parts[0]
-            last_name = " ".join(parts[1:-1]) if len(parts) > 2 else (parts[1] if len(parts) > 1 else "")
-            person = db.session.query(People).filter(
-                sa.func.lower(People.first_name) == first_name.lower(),
-                sa.func.lower(People.last_name) == last_name.lower()
-            ).first()
-            if person:
-                person.linkedin = url
+    # A retry restarts after the last checkpoint, records this job saved since then already have
+    # their LogDetail and counters, so they are not saved (and counted) again
+    saved = set(db.session.scalars(
+        confirmed_since("linkedin", LINKEDIN_FIELDS, log.created_at)
+        .where(PeopleField.people_id.in_([p.id for p in remaining]))
+    ))
+    people_records = [p for p in remaining if p.id not in saved]
 
-    n = 0
-    driver = uc.Chrome(headless=False)
+    chunks = [people_records[i:i + CHECKPOINT_SIZE] for i in range(0, len(people_records), CHECKPOINT_SIZE)]
+    pool = get_driver_pool()
+    if chunks:
+        pool.warm()  # the search and profile browsers start and log in side by side
+    cache_report = CacheReport()
 
     try:
-        profile_map = {
-            f"{p.first_name} {p.last_name}".strip(): p.linkedin
-            for p in people_records if p.linkedin
-        }
-        scraped_info = scrape_profiles(driver, profile_map, cookies_file)
-
-        for name, info in scraped_info.items():
-            try:
-                fn, *ln = name.strip().split()
-                first_name, last_name = fn, " ".join(ln)
-                person = db.session.query(People).filter(
-                    sa.func.lower(People.first_name) == first_name.lower(),
-                    sa.func.lower(People.last_name) == last_name.lower()
-                ).first()
-                if person:
-                    location = info.get("location", "")
-                    parts = [p.strip() for p in location.split(",")]
-                    
-                    city = parts[0] if len(parts) > 0 else ""
-                    state = parts[1] if len(parts) > 1 else ""
-                    country = parts[2] if len(parts) > 2 else ""
-
-                    person.organization = info.get("company", "")
-                    person.role = info.get("position", "")
-                    person.city = city
-                    person.state = state
-                    person.country = country
-                    person.email = info.get("email", "")
-                    n += 1
-                    log_detail = LogDetail(
-                        log_id=log_id,
-                        record_name=name,
-                        status="success",
-                        source=info.get("url", ""),
-                        detail=json.dumps(info)
-                    )
-                    db.session.add(log_detail)
-                    db.session.commit()
-                else:
-                    log_detail = LogDetail(
-                        log_id=log_id,
-                        record_name=name,
-                        status="error",
-                        source=info.get("url", ""),
-                        detail="Person not found in database"
-                    )
-                    db.session.add(log_detail)
-                    db.session.commit()
-            except Exception as e:
-                log_detail = LogDetail(
-                    log_id=log_id,
-                    record_name=name,
-                    status="error",
-                    source=info.get("url", ""),
-                    detail=str(e)
-                )
-                db.session.add(log_detail)
-                db.session.commit()
-                print(f"Error updating record for {name}: {e}")
+        # The URL search for the next chunk runs on another pooled browser while this chunk's profiles are scraped.
+        # Searches are planned and saved here, the worker thread only runs the ones the search cache can't answer.
+        with ThreadPoolExecutor(max_workers=1) as search_executor:
+            if chunks:
+                next_search = search_executor.submit(plan_searches(chunks[0], cache_report).search, pool)
+            for i, chunk in enumerate(chunks):
+                scraped_urls = next_search.result().save()
+                if i + 1 < len(chunks):
+                    next_search = search_executor.submit(plan_searches(chunks[i + 1], cache_report).search, pool)
+                update_people_chunk(log_id, chunk, scraped_urls, pool, cache_report)
+                if on_checkpoint:
+                    on_checkpoint(chunk[-1].id)
+
+        db.session.refresh(log)  # counters include chunks from before a resume
         log.status = "completed"
-        log.result = f"Successfully updated: {n} records, failed: {len(people_records) - n} records."
+        log.result = (f"Successfully updated: {log.success_count} records, failed: {log.total - log.success_count} records. "
+                      f"{cache_report.summary()}")
         db.session.commit()
     except Exception as e:
         print(f"Error during scraping and updating: {e}")
-        log.status = "error"
-        log.result = str(e)
-        db.session.commit()
-    finally:
-        driver.quit()
+        db.session.rollback()
+        raise  # the job runner marks the Log and retries from the last checkpoint
 
     return {"message": "Scraping + update successful"}
+
+def search_term(person):
+    return f"{person.first_name} {person.last_name} {person.organization or ''}".strip()
+
+def plan_searches(people_records, cache_report=None):
+    """SearchPlan for the records that have no LinkedIn URL yet, keyed on their name and organisation."""
+    return SearchPlan({
+        search_term(p): search_key(f"{p.first_name} {p.last_name}", p.organization)
+        for p in people_records if not p.linkedin
+    }, cache_report)
+
+def update_people_chunk(log_id, people_records, scraped_urls, pool, cache_report=None):
+    """Save the searched LinkedIn URLs, scrape the profiles of the records and save the results."""
+    # Search terms include the organisation, so results are matched back to the records searched
+    searched = {search_term(p): p for p in people_records}
+    for term, url in scraped_urls.items():
+        person = searched.get(term)
+        if person:
+            person.linkedin = url
+            copy_to_duplicates(person, ["linkedin"])
+            record_fields("linkedin", [{"id": person.id, "linkedin": url}])
+
+    # Keyed by id: two canonical records can share a name (different organisation or email)
+    profile_map = {p.id: p.linkedin for p in people_records if p.linkedin}
+    # Results arrive from several browsers at once and are saved as they come in
+    for people_id, info in iter_scraped_profiles(profile_map, pool, report=cache_report):
+        person = db.session.get(People, people_id)
+        name = f"{person.first_name} {person.last_name}".strip() if person else f"People {people_id}"
+        try:
+            if person:
+                location = info.get("location", "")
+                parts = [p.strip() for p in location.split(",")]
+                
+                city = parts[0] if len(parts) > 0 else ""
+                state = parts[1] if len(parts) > 1 else ""
+                country = parts[2] if len(parts) > 2 else ""
+
+                person.organization = info.get("company", "")
+                person.role = info.get("position", "")
+                person.city = city
+                person.state = state
+                person.country = country
+                person.email = info.get("email", "")
+                copy_to_duplicates(person, PROFILE_FIELDS)
+                # The URL is confirmed too, also for records uploaded with it, so they count as fresh
+                record_fields("linkedin", [{"id": person.id, **{f: getattr(person, f) for f in LINKEDIN_FIELDS}}])
+                add_log_details(log_id, [{
+                    "record_name": name,
+                    "status": "success",
+                    "source": info.get("url", ""),
+                    "detail": json.dumps(info)
+                }])
+            else:
+                add_log_details(log_id, [{
+                    "record_name": name,
+                    "status": "error",
+                    "source": info.get("url", ""),
+                    "detail": "Person not found in database"
+                }])
+        except Exception as e:
+            db.session.rollback()
+            add_log_details(log_id, [{
+                "record_name": name,
+                "status": "error",
+                "source": info.get("url", ""),
+                "detail": str(e)
+            }])
+            print(f"Error updating record for {name}: {e}")
+    db.session.commit()  # LinkedIn URLs of records whose profile could not be scraped
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from flask import current_app
+from app import db
+from app.models import LinkedInSearch
+from app.names import make_name_key, strip_diacritics
+from .profile_url_scrape import scrape_linkedin_people_search
+
+BATCH_SIZE = 500
+
+
+def search_key(name, organization=None):
+    """Cache key of a search: the name's key and the organisation, case, accent and whitespace insensitive."""
+    organization = strip_diacritics(" ".join((organization or "").split())).casefold()
+    return f"{make_name_key(name)}|{organization}"[:256]
+
+
+def cached_searches(keys):
+    """{key: url, or None when nothing was found} of the searches still fresh. Needs an app context."""
+    keys = list(set(keys))
+    now = datetime.now()
+    hit_cutoff = now - timedelta(days=current_app.config.get("LINKEDIN_SEARCH_HIT_TTL_DAYS", 90))
+    miss_cutoff = now - timedelta(days=current_app.config.get("LINKEDIN_SEARCH_MISS_TTL_DAYS", 14))
+    found = {}
+    for i in range(0, len(keys), BATCH_SIZE):
+        rows = db.session.execute(
+            sa.select(LinkedInSearch.query_key, LinkedInSearch.url).where(
+                LinkedInSearch.query_key.in_(keys[i:i + BATCH_SIZE]),
+                sa.or_(
+                    sa.and_(LinkedInSearch.url.isnot(None), LinkedInSearch.searched_at >= hit_cutoff),
+                    sa.and_(LinkedInSearch.url.is_(None), LinkedInSearch.searched_at >= miss_cutoff),
+                )
+            )
+        ).all()
+        found.update({row.query_key: row.url for row in rows})
+    return found
+
+
+def store_searches(outcomes):
+    """Save {key: url, or None for no profile found}, replacing older outcomes. Needs an app context."""
+    if not outcomes:
+        return
+    now = datetime.now()
+    keys = list(outcomes)
+    try:
+        # Replaced in one savepoint, a clash with another job keeps the older outcomes rather than none
+        with db.session.begin_nested():
+            for i in range(0, len(keys), BATCH_SIZE):
+                db.session.execute(sa.delete(LinkedInSearch).where(LinkedInSearch.query_key.in_(keys[i:i + BATCH_SIZE])))
+            db.session.execute(sa.insert(LinkedInSearch), [
+                {"query_key": key, "url": url, "searched_at": now} for key, url in outcomes.items()
+            ])
+    except IntegrityError:
+        print("Searches were cached by another job at the same time")
+    db.session.commit()
+
+
+def forget_search(key):
+    """Drop a cached search, so the next run searches again. Not committed."""
+    db.session.execute(sa.delete(LinkedInSearch).where(LinkedInSearch.query_key == key))
+
+
+class SearchPlan:
+    """
+    LinkedIn people searches for {search term: key}, answered from the search cache where possible.
+    Built and saved with an app context; search() only drives the browser, so it can run in another thread.
+    """
+
+    def __init__(self, queries, report=None):
+        self.queries = queries
+        cached = cached_searches(queries.values())
+        self.cached = {term: cached[key] for term, key in queries.items() if cached.get(key)}
+        self.to_search = [term for term, key in queries.items() if key not in cached]
+        self.found = {}
+        self.not_found = set()
+        if report:
+            report.record_searches(hits=len(queries) - len(self.to_search), misses=len(self.to_search))
+
+    def search(self, pool=None):
+        if self.to_search:
+            self.found = scrape_linkedin_people_search(self.to_search, pool, not_found=self.not_found)
+        return self
+
+    def save(self):
+        """Cache what the searches found, or did not find, and return {term: url} including cache hits."""
+        outcomes = {self.queries[term]: url for term, url in self.found.items()}
+        outcomes.update({self.queries[term]: None for term in self.not_found})
+        store_searches(outcomes)
+        return {**self.cached, **self.found}
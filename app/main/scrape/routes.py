@@ -1,8 +1,12 @@
 import time
 from .helper.ip_scraping import scrape_https_proxies 
-from .helper.profile_url_scrape import scrape_linkedin_people_search
+from .helper.search_cache import SearchPlan, search_key, forget_search
+from .helper.profile_cache import canonical_profile_url
 from app import db
-from app.models import IP, People
+from app.models import People, PeopleField, LinkedInProfile
+from app.proxies import store_proxies, check_proxies
+from app.names import make_name_key
+from app.dedupe import duplicates_of, copy_to_duplicates
 from flask import Flask, render_template,flash, redirect,url_for,request, jsonify,send_file
 from sqlalchemy.exc import SQLAlchemyError
 from app.main.scrape import sc
@@ -56,34 +60,22 @@ def conditional_get_people_names_for_information_searching(number: int):
 @sc.route('/scrape_and_store_proxies', methods=['GET'])
 @login_required
 def scrape_and_store_proxies():
+    """Add newly listed proxies to the IP table, then probe all of them and expire the dead ones."""
     try:
-       
         https_proxies = scrape_https_proxies()
+        added = store_proxies(https_proxies, proxy_type="https", source="free-proxy-list")
+        alive, expired = check_proxies()
 
-        session = db.session
-
-        for proxy in https_proxies:
-           
-            address, port = proxy.split(":")
-            port = int(port) 
-
-            
-            ip_entry = IP(
-                address=address,
-                port=port,
-                type="https",
-                source="free-proxy-list",
-                is_expired=False  
-            )
-
-            session.add(ip_entry)
-
-        session.commit()
-        
-        return jsonify({"message": "Proxies successfully scraped and stored."}), 200
+        return jsonify({
+            "message": "Proxies successfully scraped and checked.",
+            "listed": len(https_proxies),
+            "added": added,
+            "alive": alive,
+            "expired": expired,
+        }), 200
 
     except SQLAlchemyError as e:
-        session.rollback()  
+        db.session.rollback()
         return jsonify({"error": str(e)}), 500
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -96,28 +88,22 @@ def scrape_linkedin():
         # Get names
         names = conditional_get_people_names_for_url_searching(number)
 
-        # Execute scraping
-        cookies_file = "my_linkedin_cookies.json"
-        results = scrape_linkedin_people_search(names, LINKEDIN_EMAIL, LINKEDIN_PASSWORD, cookies_file)
+        # Execute scraping, names searched recently come from the search cache
+        results = SearchPlan({name: search_key(name) for name in names}).search().save()
 
         # Construct final result format
         formatted_results = {}
 
         for name, url in results.items():
-            name_parts = name.strip().split()
-            first_name = name_parts[0]
-            last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-
             # Save profile to DB
             people_match = db.session.query(People).filter(
-                sa.func.lower(People.first_name) == first_name.lower(),
-                sa.func.lower(People.last_name) == last_name.lower()
+                People.name_key == make_name_key(name)
             ).first()
             if people_match:
                 people_match.linkedin = url
-                formatted_results[f"{first_name} {last_name}".strip()] = url
+                formatted_results[name.strip()] = url
             else:
-                print(f"No matching People record found for {first_name} {last_name}")
+                print(f"No matching People record found for {name}")
 
         # Commit DB changes
         db.session.commit()
@@ -155,17 +141,12 @@ def scrape_linkedin_information():
         }
 
         # Step 3: Scrape profiles
-        scraped_results = scrape_profiles(profile_map, LINKEDIN_EMAIL, LINKEDIN_PASSWORD)
+        scraped_results = scrape_profiles(profile_map)
 
         # Step 4: Update People table with scraped data
         for name, info in scraped_results.items():
-            name_parts = name.strip().split()
-            first_name = name_parts[0]
-            last_name = " ".join(name_parts[1:]) if len(name_parts) > 1 else ""
-
             person = db.session.query(People).filter(
-                sa.func.lower(People.first_name) == first_name.lower(),
-                sa.func.lower(People.last_name) == last_name.lower()
+                People.name_key == make_name_key(name)
             ).first()
 
             if person:
@@ -205,19 +186,13 @@ def scrape_from_linkedin():
             if not p.linkedin  # skip if already has a LinkedIn URL
         ]
 
-        # Step 3: Scrape LinkedIn URLs
-        cookies_file = "my_linkedin_cookies.json"
-        scraped_urls = scrape_linkedin_people_search(
-            names, LINKEDIN_EMAIL, LINKEDIN_PASSWORD, cookies_file
-        )
+        # Step 3: Scrape LinkedIn URLs, names searched recently come from the search cache
+        scraped_urls = SearchPlan({name: search_key(name) for name in names}).search().save()
 
         # Step 4: Update People table with LinkedIn URLs
         for name, url in scraped_urls.items():
-            fn, *ln = name.strip().split()
-            first_name, last_name = fn, " ".join(ln)
             person = db.session.query(People).filter(
-                sa.func.lower(People.first_name) == first_name.lower(),
-                sa.func.lower(People.last_name) == last_name.lower()
+                People.name_key == make_name_key(name)
             ).first()
             if person:
                 person.linkedin = url
@@ -227,15 +202,12 @@ def scrape_from_linkedin():
             f"{p.first_name} {p.last_name}".strip(): p.linkedin
             for p in people_records if p.linkedin
         }
-        scraped_info = scrape_profiles(profile_map, LINKEDIN_EMAIL, LINKEDIN_PASSWORD)
+        scraped_info = scrape_profiles(profile_map)
 
         # Step 6: Update People table with scraped info
         for name, info in scraped_info.items():
-            fn, *ln = name.strip().split()
-            first_name, last_name = fn, " ".join(ln)
             person = db.session.query(People).filter(
-                sa.func.lower(People.first_name) == first_name.lower(),
-                sa.func.lower(People.last_name) == last_name.lower()
+                People.name_key == make_name_key(name)
             ).first()
             if person:
                 person.organization = info.get("company", "")
@@ -273,4 +245,37 @@ def scrape_from_linkedin():
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
-       
\ No newline at end of file
+       
+# Operator override: forget what the LinkedIn caches know about one person
+@sc.route('/refresh_linkedin/<int:people_id>', methods=['POST'])
+@login_required
+def refresh_linkedin(people_id):
+    try:
+        person = db.session.get(People, people_id)
+        if not person:
+            return jsonify({"error": "People record not found"}), 404
+        if person.canonical_id:
+            person = db.session.get(People, person.canonical_id)
+
+        # Cached searches, with and without the organisation, and the cached profile
+        name = f"{person.first_name} {person.last_name}".strip()
+        forget_search(search_key(name, person.organization))
+        forget_search(search_key(name))
+        url = canonical_profile_url(person.linkedin)
+        if url:
+            db.session.execute(sa.delete(LinkedInProfile).where(LinkedInProfile.url == url))
+
+        # Drop the URL and its provenance so the next LinkedIn job searches and scrapes the record again
+        ids = [person.id] + duplicates_of([person.id]).get(person.id, [])
+        db.session.execute(
+            sa.delete(PeopleField).where(PeopleField.source == "linkedin", PeopleField.people_id.in_(ids))
+        )
+        person.linkedin = None
+        copy_to_duplicates(person, ["linkedin"])
+        db.session.commit()
+
+        return jsonify({"message": f"LinkedIn data of {name} will be refreshed on the next run", "id": person.id}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
@@ -25,4 +25,6 @@ STATES = {
     "Tasmania": "TAS",
     "Victoria": "VIC",
     "Western Australia": "WA"
-}
\ No newline at end of file
+}
+
+BASE_URL = "https://www.directory.gov.au"
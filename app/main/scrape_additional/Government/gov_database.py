@@ -1,5 +1,8 @@
+from datetime import datetime
+import sqlalchemy as sa
 from app import db
-from app.models import GovPeople
+from app.models import GovPeople, GovPage
+from app.names import make_name_key
 
 FIELD_MAP = {
     "Salutation": "salutation",
@@ -15,32 +18,140 @@ FIELD_MAP = {
     "Country": "country"
 }
 
+# Overwritten only by non-empty scraped values
+MERGE_FIELDS = [
+    "salutation", "organization", "role", "gender",
+    "city", "state", "country", "business_phone",
+    "mobile_phone", "email", "sector"
+]
+INSERT_FIELDS = ["first_name", "last_name"] + MERGE_FIELDS + ["source_url"]
+
+
+def upsert_statement():
+    """
+    INSERT ... ON CONFLICT (name_key) DO UPDATE for the database in use (SQLite or PostgreSQL),
+    None for other databases, which are merged row by row instead.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+
+    stmt = insert(GovPeople)
+    table = GovPeople.__table__
+    merged = {
+        field: sa.func.coalesce(sa.func.nullif(stmt.excluded[field], ""), table.c[field])
+        for field in MERGE_FIELDS
+    }
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.name_key],
+        set_={**merged, "source_url": stmt.excluded.source_url, "removed_at": None}
+    )
+
+
+def merge_rows(rows):
+    """Per-row ORM version of the upsert, for databases without ON CONFLICT."""
+    keys = [row["name_key"] for row in rows]
+    existing = {}
+    for i in range(0, len(keys), 500):
+        existing.update({
+            person.name_key: person
+            for person in db.session.scalars(sa.select(GovPeople).where(GovPeople.name_key.in_(keys[i:i + 500])))
+        })
+    for row in rows:
+        person = existing.get(row["name_key"])
+        if person is None:
+            db.session.add(GovPeople(**row))
+            continue
+        for field in MERGE_FIELDS:
+            if row[field]:
+                setattr(person, field, row[field])
+        person.source_url = row["source_url"]
+        person.removed_at = None  # listed again
+
+
 def commit_batch(batch):
+    """Upsert scraped GovPeople on name_key in one statement, later non-empty values win."""
+    rows = {}
     for new_person in batch:
-        existing = GovPeople.query.filter_by(
-            first_name=new_person.first_name,
-            last_name=new_person.last_name,
-        ).first()
-
+        row = {field: getattr(new_person, field, None) for field in INSERT_FIELDS}
+        key = make_name_key(row["first_name"], row["last_name"])
+        if not key:
+            continue
+        existing = rows.get(key)
         if existing:
-            for field in [
-                "salutation", "organization", "role", "gender",
-                "city", "state", "country", "business_phone",
-                "mobile_phone", "email", "sector"
-            ]:
-                new_val = getattr(new_person, field, None)
-                if new_val:
-                    setattr(existing, field, new_val)
+            # ON CONFLICT cannot touch the same row twice in one statement, merge here instead
+            for field in MERGE_FIELDS:
+                if row[field]:
+                    existing[field] = row[field]
+            existing["source_url"] = row["source_url"]
         else:
-            db.session.add(new_person)
+            rows[key] = {**row, "name_key": key}
+
+    if rows:
+        stmt = upsert_statement()
+        if stmt is None:
+            merge_rows(list(rows.values()))
+        else:
+            db.session.execute(stmt, list(rows.values()))
+    db.session.commit()
+
+
+def load_pages():
+    """Page state from the last crawl, url -> {"content_hash", "links", "name_keys"}."""
+    rows = db.session.execute(
+        sa.select(GovPage.url, GovPage.content_hash, GovPage.links, GovPage.name_keys)
+    ).all()
+    return {
+        row.url: {"content_hash": row.content_hash, "links": row.links, "name_keys": row.name_keys or []}
+        for row in rows
+    }
+
+
+def save_pages(pages, prune=False):
+    """Store the state of every crawled page. prune: delete pages the crawl no longer reached."""
+    existing = dict(db.session.execute(sa.select(GovPage.url, GovPage.id)).all())
+    now = datetime.now()
+    rows = [
+        {"url": url, "content_hash": state["content_hash"], "links": state["links"],
+         "name_keys": state["name_keys"], "crawled_at": now}
+        for url, state in pages.items()
+    ]
+    inserts = [r for r in rows if r["url"] not in existing]
+    updates = [{"id": existing[r["url"]], **r} for r in rows if r["url"] in existing]
+    if inserts:
+        db.session.execute(sa.insert(GovPage), inserts)
+    if updates:
+        db.session.bulk_update_mappings(GovPage, updates)
+    if prune:
+        gone = [page_id for url, page_id in existing.items() if url not in pages]
+        for i in range(0, len(gone), 500):
+            db.session.execute(sa.delete(GovPage).where(GovPage.id.in_(gone[i:i + 500])))
+    db.session.commit()
+
 
+def tombstone_unlisted(listed_name_keys):
+    """Mark people that no crawled page lists any more as removed. Returns how many were marked."""
+    rows = db.session.execute(
+        sa.select(GovPeople.id, GovPeople.name_key).where(GovPeople.removed_at.is_(None))
+    ).all()
+    gone = [row.id for row in rows if row.name_key not in listed_name_keys]
+    now = datetime.now()
+    for i in range(0, len(gone), 500):
+        db.session.execute(
+            sa.update(GovPeople).where(GovPeople.id.in_(gone[i:i + 500])).values(removed_at=now)
+        )
     db.session.commit()
+    return len(gone)
 
 
 def search_database(fname, lname):
     person = GovPeople.query.filter_by(
-        first_name=fname,
-        last_name=lname
+        name_key=make_name_key(fname, lname),
+        removed_at=None
     ).first()
 
     if person:
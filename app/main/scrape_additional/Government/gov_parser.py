@@ -0,0 +1,195 @@
+import lxml.html
+from lxml import etree
+from bs4.dammit import UnicodeDammit
+from typing import Optional, List
+
+from app.main.scrape_additional.Government.gov_scraper_person import Person
+from app.main.scrape_additional.Government.constants import BASE_URL
+
+# lxml parsing of directory.gov.au pages. Elements are located with compiled XPath and text is
+# read the way BeautifulSoup reads it, so results match the previous html.parser implementation.
+
+
+def has_class(*names):
+    """XPath predicate: the element has any of the given classes."""
+    return " or ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+
+# BeautifulSoup's get_text() leaves out script and style contents
+TEXT = etree.XPath(".//text()[not(parent::script or parent::style)]")
+CHILDREN_CONTAINING = etree.XPath("./*[contains(., $text)]")
+LINKS = etree.XPath(".//a")
+LIST_ITEMS = etree.XPath(".//li")
+
+LISTING_TITLES = etree.XPath("//td[normalize-space(@class)='views-field views-field-title']")
+CONTENT_SECTIONS = etree.XPath(f"//section[{has_class('views-element-container', 'block-directory-custom')}]")
+SECTION_BLOCK = etree.XPath(f"//section[{has_class('block-directory-custom-section-block')}]")
+GROUP_ITEMS = etree.XPath(f".//li[{has_class('list-group-item')}]")
+
+CONTACT_CONTAINER = etree.XPath("//div[normalize-space(@class)='view-content container']")
+CONTACT_PHONE = etree.XPath(f".//span[{has_class('text-phone')}]")
+CONTACT_EMAIL = etree.XPath(f".//span[{has_class('text-email')}]")
+CONTACT_LOCATION = etree.XPath(f".//div[{has_class('building-location')}]")
+
+PERSON_PHONE = etree.XPath(".//a[@data-original-title='Phone Number']")
+PERSON_EMAIL = etree.XPath(".//a[@data-original-title='Email']")
+ROLE_LINKS = etree.XPath(".//a[starts-with(@href, '/portfolios/')]")
+PEOPLE_LINKS = etree.XPath(".//a[starts-with(@href, '/people/')]")
+
+
+def parse_html(content):
+    """Parse a page, decoding bytes the same way BeautifulSoup does."""
+    if isinstance(content, bytes):
+        content = UnicodeDammit(content, is_html=True).unicode_markup
+    try:
+        return lxml.html.document_fromstring(content)
+    except etree.ParserError:
+        return lxml.html.document_fromstring("<html></html>")  # empty page
+
+
+def first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+
+def get_text(element) -> str:
+    """Same as BeautifulSoup's element.text"""
+    return "".join(TEXT(element))
+
+
+def get_stripped_text(element) -> str:
+    """Same as BeautifulSoup's element.get_text(strip=True)"""
+    return "".join(s.strip() for s in TEXT(element))
+
+
+def has_text(element, text: str) -> bool:
+    """
+    True when a tag inside element contains text. A descendant containing it means the child
+    above it does too, so only the direct children are searched, by libxml2. The few that match
+    are checked again without their scripts.
+    """
+    return any(text in get_text(child) for child in CHILDREN_CONTAINING(element, text=text))
+
+
+def parse_organisation_info(doc):
+    """Extract phone, email, and location from the organisation's contact section."""
+    contact_info = {
+        "phone": None,
+        "email": None,
+        "location": None
+    }
+
+    contact_container = first(CONTACT_CONTAINER, doc)
+    if contact_container is None:
+        return contact_info
+
+    phone = first(CONTACT_PHONE, contact_container)
+    contact_info["phone"] = get_stripped_text(phone) if phone is not None else None
+
+    email = first(CONTACT_EMAIL, contact_container)
+    contact_info["email"] = get_stripped_text(email) if email is not None else None
+
+    location_elem = first(CONTACT_LOCATION, contact_container)
+    if location_elem is not None:
+        location_link = first(LINKS, location_elem)
+        if location_link is not None:
+            contact_info["location"] = get_stripped_text(location_link)
+
+    return contact_info
+
+
+def parse_people(person_element, organisation: str, location: Optional[str]) -> Person:
+    """Extract person details from a 'Key People' entry."""
+    person = Person()
+    person.addOrganisation(organisation)
+    person.addLocation(location)
+
+    # Position and name
+    links = LINKS(person_element)
+    if links:
+        person.addPosition(get_stripped_text(links[0]))
+        if len(links) > 1:
+            person.addName(get_stripped_text(links[1]))
+
+    # Contact info
+    phone_element = first(PERSON_PHONE, person_element)
+    if phone_element is not None:
+        person.addPhone(get_stripped_text(phone_element))
+
+    email_element = first(PERSON_EMAIL, person_element)
+    if email_element is not None:
+        person.addEmail(get_stripped_text(email_element))
+
+    return person
+
+
+def parse_key_people(element, organisation: str, location: Optional[str]) -> List[Person]:
+    """Parse all people under 'Key People'."""
+    return [parse_people(entry, organisation, location) for entry in GROUP_ITEMS(element)]
+
+
+def scrape_boards(element, text, organisation, location, department=None) -> List[Person]:
+    """Scrape board appointments."""
+    people_objs = []
+    if has_text(element, text):
+        roles = ROLE_LINKS(element)
+        for i, person in enumerate(PEOPLE_LINKS(element)):
+            person_obj = Person()
+            person_obj.addOrganisation(organisation)
+            person_obj.addDepartment(department)
+            if i < len(roles):
+                person_obj.addPosition(get_text(roles[i]).strip())
+            person_obj.addName(get_text(person).strip())
+            person_obj.addLocation(location)
+            people_objs.append(person_obj)
+    return people_objs
+
+
+def content_sections(doc):
+    return CONTENT_SECTIONS(doc)
+
+
+def board_links(element):
+    """(board name, href) of the boards listed under 'Government appointed boards'."""
+    boards = []
+    for item in LIST_ITEMS(element):
+        a_tag = first(LINKS, item)
+        if a_tag is None:
+            continue
+        boards.append((get_text(item).strip(), a_tag.attrib["href"]))
+    return boards
+
+
+def organisation_link(result):
+    """Link to an organisation (a listing cell or a section list item)."""
+    a_tag = first(LINKS, result)
+    if a_tag is None:
+        return None
+    href = a_tag.attrib["href"]
+    if not href:
+        return None
+    return ["organisation", BASE_URL + href, {"organisation": get_text(result).strip()}, True]
+
+
+def section_links(doc):
+    """Links to the 'Sections' within an organisation page."""
+    section_block = first(SECTION_BLOCK, doc)
+    if section_block is None:
+        return []
+
+    links = []
+    for item in GROUP_ITEMS(section_block):
+        link = organisation_link(item)
+        if link:
+            links.append(link)
+    return links
+
+
+def listing_links(doc):
+    """Links to every organisation in the directory listing."""
+    links = []
+    for result in LISTING_TITLES(doc):
+        link = organisation_link(result)
+        if link:
+            links.append(link)
+    return links
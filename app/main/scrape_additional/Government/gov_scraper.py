@@ -1,23 +1,37 @@
-import requests, re, concurrent.futures
-from bs4 import BeautifulSoup
-from typing import Optional, List
-from urllib.parse import urljoin, urlparse
-import threading
+import requests, functools, hashlib, threading
+from typing import Optional
 
 from app.main.scrape_additional.Government.gov_scraper_person import Person
-from app.main.scrape_additional.Government.gov_database import commit_batch
+from app.main.scrape_additional.Government.constants import BASE_URL
+from app.main.scrape_additional.Government.gov_parser import (
+    parse_html, parse_organisation_info, parse_key_people, scrape_boards, has_text,
+    content_sections, board_links, section_links, listing_links
+)
+from app.main.scrape_additional.Government.gov_database import commit_batch, load_pages, save_pages, tombstone_unlisted
+from app.main.scrape_additional.crawler import Crawler, CrawlRequest
+from app.main.scrape_additional.http_cache import get_http_cache, ChangeReport
+from app.main.scrape_additional.robots import get_robots_policy
 from app.models import GovPeople
+from app.proxies import RotatingSession
+from app.names import make_name_key
 
-BASE_URL = 'https://www.directory.gov.au'
 UA = "Perth USAsia Centre/1.0 (+contact: lisa.cluett@perthusasia.edu.au)"
 
-session = requests.Session()
+# Crawl budget: pages in flight overall, and per host at once / per second
+CRAWL_CONCURRENCY = 16
+PER_HOST_CONCURRENCY = 8
+PER_HOST_RATE = 10.0
+
+session = RotatingSession()
 session.headers.update({"User-Agent": UA})
 
-def get_page(url: str) -> Optional[requests.Response]:
-    """Fetch a webpage and return its response object."""
+def get_page(url: str, report: Optional[ChangeReport] = None) -> Optional[requests.Response]:
+    """Fetch a webpage through the page cache and return its response object."""
+    if not get_robots_policy().can_fetch(url, UA):
+        print(f"Blocked by robots: {url}")
+        return None
     try:
-        response = session.get(url, timeout=15)
+        response = get_http_cache().get(session, url, report=report, timeout=15)
         response.raise_for_status()
         return response
     except requests.RequestException as e:
@@ -25,94 +39,7 @@ def get_page(url: str) -> Optional[requests.Response]:
         return None
 
 
-def parse_organisation_info(soup):
-    """Extract phone, email, and location from the organisation's contact section."""
-    contact_info = {
-        "phone": None,
-        "email": None,
-        "location": None
-    }
-
-    contact_container = soup.find("div", class_="view-content container")
-    if not contact_container:
-        return contact_info
-    
-    contact_info["phone"] = (
-        contact_container.find("span", class_="text-phone").get_text(strip=True)
-        if contact_container.find("span", class_="text-phone") 
-        else None
-    )
-
-    contact_info["email"] = (
-        contact_container.find("span", class_="text-email").get_text(strip=True)
-        if contact_container.find("span", class_="text-email")
-        else None
-    )
-
-    location_elem = contact_container.find("div", class_="building-location")
-    if location_elem and location_elem.find("a"):
-        contact_info["location"] = location_elem.find("a").get_text(strip=True)
-
-    return contact_info
-
-def parse_people(person_element, organisation: str, location: Optional[str]) -> Person:
-    """Extract person details from a 'Key People' entry."""
-    person = Person()
-    person.addOrganisation(organisation)
-    person.addLocation(location)
-
-    # Position and name
-    links = person_element.find_all("a")
-    if links:
-        person.addPosition(links[0].get_text(strip=True))
-        if len(links) > 1:
-            person.addName(links[1].get_text(strip=True))
-
-    # Contact info
-    phone_element = person_element.find('a', attrs={"data-original-title": "Phone Number"})
-    if phone_element:
-        person.addPhone(phone_element.get_text(strip=True))
-    
-    email_element = person_element.find('a', attrs={"data-original-title": "Email"})
-    if email_element:
-        person.addEmail(email_element.get_text(strip=True))
-
-    return person
-
-
-def find_text(element, text: str):
-    """Find element containing specific text."""
-    return element.find(lambda tag: text in tag.get_text())
-
-
-def parse_key_people(element, organisation: str, location: Optional[str]) -> List[Person]:
-    """Parse all people under 'Key People'."""
-    people = []
-    entries = element.find_all("li", class_="list-group-item")
-    for entry in entries:
-        people.append(parse_people(entry, organisation, location))
-    return people
-
-
-def scrape_boards(element, text, organisation, location, department=None) -> List[Person]:
-    """Scrape board appointments."""
-    people_objs = []
-    if find_text(element, text):
-        roles = element.find_all('a', href=re.compile(r"^/portfolios/"))
-        people = element.find_all('a', href=re.compile(r"^/people/"))
-        for i, person in enumerate(people):
-            person_obj = Person()
-            person_obj.addOrganisation(organisation)
-            person_obj.addDepartment(department)
-            if i < len(roles):
-                person_obj.addPosition(roles[i].text.strip())
-            person_obj.addName(person.text.strip())
-            person_obj.addLocation(location)
-            people_objs.append(person_obj)
-    return people_objs
-
-
-def person_to_model(person: Person, fallback_info) -> GovPeople:
+def person_to_model(person: Person, fallback_info, source_url=None) -> GovPeople:
     """Map Person object to GovPeople model instance."""
     return GovPeople(
         salutation=person.salutation,
@@ -128,146 +55,163 @@ def person_to_model(person: Person, fallback_info) -> GovPeople:
         mobile_phone=None,   # Not scraped
         email=person.email if person.email else fallback_info["email"],
         sector=person.department,
+        source_url=source_url,
     )
 
-def normalise_url(url: str) -> str:
+# Links to crawl next are [kind, url, context, dedupe] lists, so they can be stored in gov_page as JSON
+
+def parse_organisation_page(content, url, organisation):
     """
-    Normalize URL by:
-    - Lowercasing
-    - Removing trailing slashes
-    - Removing fragments
+    Parse an organisation (or section) page.
+    Returns its GovPeople and the board and section pages to crawl next.
     """
-    parsed = urlparse(url)
-    normalized = parsed._replace(fragment="") # Remove #fragment
-    path = normalized.path.rstrip("/") # Remove trailing slash
-    return urljoin(f"{normalized.scheme}://{normalized.netloc}", path).lower()
-
-visited = set()
-visited_lock = threading.Lock()
-
-def scrape_sections(soup):
-    """Scrape and recurse into 'Sections' links within an organisation page."""
-    section_block = soup.find("section", class_="block-directory-custom-section-block")
-    if not section_block:
-        return []
-
-    section_links = section_block.find_all("li", class_="list-group-item")
-    if not section_links:
-        return []
-
-    all_people = []
-    for link in section_links:
-
-        a_tag = link.find("a")
-        if not a_tag:
-            continue
-        href = a_tag["href"]
-        if not href:
-            continue
-
-        section_url = BASE_URL + href
-
-        # Skip already visited URLs
-        if normalise_url(section_url) in visited:
-            continue
+    doc = parse_html(content)
 
-        with visited_lock: # Ensure thread-safe access to visited set
-            visited.add(normalise_url(section_url))
-
-        section_results = scrape_organisation(link)
-        all_people.extend(section_results)
-
-    return all_people
+    fallback_info = parse_organisation_info(doc)
 
+    org_results = content_sections(doc)
+    if not org_results:
+        return [], []
 
-def scrape_organisation(result):
-    """Scrape an organisation and return list of GovPeople."""
+    location = fallback_info["location"]
     org_people = []
+    links = []
 
-    a_tag = result.find("a")
-    if not a_tag:
-        return []
+    for org_result in org_results:
+        # Key People
+        if has_text(org_result, "Key People"):
+            people_objs = parse_key_people(org_result, organisation, location)
+            org_people.extend([person_to_model(p, fallback_info, url) for p in people_objs])
 
-    organisation = result.text.strip()
-    href = a_tag["href"]
-    if not href:
-        return []
+        # Executive appointments
+        board_people = scrape_boards(org_result, "Current single executive appointments", organisation, location)
+        org_people.extend([person_to_model(p, fallback_info, url) for p in board_people])
 
-    org_page = get_page(BASE_URL + href)
+        # Linked boards, each one crawled on its own
+        if has_text(org_result, "Government appointed boards"):
+            for board_name, href in board_links(org_result):
+                # A board listed by several organisations is recorded under each of them
+                links.append(["board", BASE_URL + href, {
+                    "organisation": organisation,
+                    "location": location,
+                    "fallback_info": fallback_info,
+                    "board_name": board_name,
+                }, False])
 
-    with visited_lock: # Ensure thread-safe access to visited set
-        visited.add(normalise_url(BASE_URL + href))
+    # Linked sections are crawled like organisations
+    links.extend(section_links(doc))
 
-    if not org_page:
-        return []
+    return org_people, links
 
-    soup = BeautifulSoup(org_page.content, "html.parser")
 
-    fallback_info = parse_organisation_info(soup)
+def parse_board_page(content, url, organisation, location, fallback_info, board_name):
+    """Parse a board page linked from an organisation."""
+    people = []
+    for board_result in content_sections(parse_html(content)):
+        board_people = scrape_boards(
+            board_result,
+            "Current board appointments",
+            organisation,
+            location,
+            department=board_name
+        )
+        people.extend([person_to_model(p, fallback_info, url) for p in board_people])
+    return people, []
 
-    org_results = soup.find_all("section", class_=["views-element-container", "block-directory-custom"])
-    if not org_results:
-        return []
 
-    location = fallback_info["location"]
+PAGE_PARSERS = {
+    "organisation": parse_organisation_page,
+    "board": parse_board_page,
+}
 
-    for org_result in org_results:
-        # Key People
-        if find_text(org_result, "Key People"):
-            people_objs = parse_key_people(org_result, organisation, location)
-            org_people.extend([person_to_model(p, fallback_info) for p in people_objs])
 
-        # Executive appointments
-        board_people = scrape_boards(org_result, "Current single executive appointments", organisation, location)
-        org_people.extend([person_to_model(p, fallback_info) for p in board_people])
-
-        # Linked boards
-        if find_text(org_result, "Government appointed boards"):
-            boards = org_result.find_all("li")
-            for board in boards:
-                board_name = board.text.strip()
-                a_tag = board.find("a")
-                if not a_tag:
-                    continue
-
-                board_href = a_tag["href"]
-                board_page = get_page(BASE_URL + board_href)
-                if not board_page:
-                    continue
-
-                # 🔧 Manual inline parsing again
-                board_soup = BeautifulSoup(board_page.content, "html.parser")
-                board_results = board_soup.find_all("section", class_=["views-element-container", "block-directory-custom"])
-                for board_result in board_results:
-                    board_people = scrape_boards(
-                        board_result,
-                        "Current board appointments",
-                        organisation,
-                        location,
-                        department=board_name
-                    )
-                    org_people.extend([person_to_model(p, fallback_info) for p in board_people])
-
-    # Search through linked sections
-    section_people = scrape_sections(soup)
-    org_people.extend(section_people)
-
-    return org_people
-
-
-def update_gov_database():
-    """Main entrypoint: scrape and update DB."""
-    page = get_page(BASE_URL + '/commonwealth-entities-and-companies')
+class GovCrawl:
+    """
+    Incremental crawl of the directory. A page whose content hash matches the last crawl is not
+    parsed again: its people stay as they are and its stored links are followed instead.
+    `previous` maps url -> {"content_hash", "links", "name_keys"} from gov_page.
+    """
+
+    def __init__(self, previous, full=False):
+        self.previous = previous
+        self.full = full
+        self.pages = {}   # url -> state after this crawl
+        self.parsed = 0
+        self.skipped = 0
+        self.lost = 0     # pages that failed with nothing known about them
+        self.lock = threading.Lock()
+
+    def request(self, kind, url, context, dedupe=True) -> CrawlRequest:
+        return CrawlRequest(url, functools.partial(self.handle, kind, url), context, dedupe,
+                            on_error=functools.partial(self.handle_error, url))
+
+    def follow(self, links):
+        return [self.request(*link) for link in links]
+
+    def keep(self, url, state):
+        with self.lock:
+            self.pages[url] = state
+
+    def handle(self, kind, url, response, **context):
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        previous = self.previous.get(url)
+        if previous and previous["content_hash"] == content_hash and not self.full:
+            self.keep(url, previous)
+            with self.lock:
+                self.skipped += 1
+            return [], self.follow(previous["links"] or [])
+
+        try:
+            people, links = PAGE_PARSERS[kind](response.content, url, **context)
+        except Exception as e:
+            # A page that cannot be parsed is treated like one that cannot be fetched
+            print(f"Failed to parse {url}: {e}")
+            return self.handle_error(url)
+        name_keys = {make_name_key(p.first_name, p.last_name) for p in people if p.first_name or p.last_name}
+        with self.lock:
+            self.parsed += 1
+            state = self.pages.get(url)
+            if state and state["content_hash"] == content_hash:
+                name_keys |= set(state["name_keys"])  # same board listed by another organisation
+            self.pages[url] = {"content_hash": content_hash, "links": links, "name_keys": sorted(name_keys)}
+        return people, self.follow(links)
+
+    def handle_error(self, url, **context):
+        """Keep what the last crawl knew about a page that could not be fetched this time."""
+        previous = self.previous.get(url)
+        if previous:
+            self.keep(url, previous)
+            return [], self.follow(previous["links"] or [])
+        with self.lock:
+            self.lost += 1
+        return [], []
+
+    def listed_name_keys(self):
+        return {key for state in self.pages.values() for key in state["name_keys"]}
+
+
+def update_gov_database(full=False):
+    """
+    Main entrypoint: scrape and update DB.
+    Only pages that changed since the last crawl are parsed and upserted, unless full=True.
+    """
+    report = ChangeReport()
+    page = get_page(BASE_URL + '/commonwealth-entities-and-companies', report)
     if not page:
         raise Exception(f"Failed to load main government page, URL:{BASE_URL}/commonwealth-entities-and-companies")
 
-    soup = BeautifulSoup(page.content, "html.parser")
-    results = soup.find_all("td", class_="views-field views-field-title")
+    crawl = GovCrawl(load_pages(), full=full)
 
-    all_people = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-        for org_people in executor.map(scrape_organisation, results):
-            all_people.extend(org_people)
+    # Organisations, sections and boards share one frontier, visited URLs are tracked per crawl
+    crawler = Crawler(functools.partial(get_page, report=report), concurrency=CRAWL_CONCURRENCY,
+                      per_host=PER_HOST_CONCURRENCY, per_host_rate=PER_HOST_RATE,
+                      is_cached=get_http_cache().is_fresh,
+                      delay_for=functools.partial(get_robots_policy().crawl_delay, user_agent=UA))
+    for link in listing_links(parse_html(page.content)):
+        crawler.add(crawl.request(*link))
+    all_people = crawler.run()
+    print(f"Crawled {crawler.fetched} pages, {crawler.failed} failed. Pages: {report.summary()}")
+    print(f"Parsed {crawl.parsed} changed pages, skipped {crawl.skipped} unchanged pages")
 
     # Commit in batches
     batch_size = 1000
@@ -276,3 +220,12 @@ def update_gov_database():
         commit_batch(batch)  
 
     print(f"✅ Inserted/updated {len(all_people)} records into gov_people")
+
+    # Without a complete picture of the directory, nobody can be said to be gone
+    complete = crawl.lost == 0 and crawler.errors == 0
+    save_pages(crawl.pages, prune=complete)
+    if complete:
+        removed = tombstone_unlisted(crawl.listed_name_keys())
+        print(f"Marked {removed} records no longer in the directory as removed")
+    else:
+        print(f"⚠️ {crawl.lost + crawler.errors} pages could not be crawled, removed people are not marked this time")
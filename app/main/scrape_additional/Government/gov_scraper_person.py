@@ -1,5 +1,5 @@
-import re
-from .constants import AUS_STATES, PREFIXES, SUFFIXES, GENDERS, MALES, FEMALES
+from app.names import parse_name
+from .constants import AUS_STATES, MALES, FEMALES
 
 class Person:
     def __init__(self):
@@ -23,38 +23,13 @@ class Person:
 
     def addName(self, name):
         self.name = name
-        
-        # Preprocessing
-        name = name.strip()
-        name = re.sub(r'\(.*?\)', '', name)
-        
-        # Save prefix as salutation
-        tokens = name.replace(',', ' ').split()
-        
-        prefix_index = -1
-        for i, token in enumerate(tokens):      # Can handle a mix of invalid and valid prefixes at the start
-            if token in PREFIXES:               # But cannot handle separated valid salutation at the end
-                prefix_index = i                # e.g. The Hon. Peter Mcclellan Justice
-        
-        if prefix_index >= 0:
-            salutation = " ".join(tokens[:prefix_index + 1])
-            self.salutation = salutation
-            
-            # Identify gender
-            last_salutation = salutation.split()[-1]        # assume gender salutation is always at the end
-            if last_salutation in GENDERS:
-                self.addGender(last_salutation)
-                
-            tokens = tokens[prefix_index + 1:]
-        
-        # Remove suffixes
-        while tokens and tokens[-1].rstrip('-') in SUFFIXES:
-            tokens.pop(-1)
-        
-        # Split fname and lname
-        if tokens:
-            self.fname = tokens[0]
-            self.lname = " ".join(tokens[1:])
+        parsed = parse_name(name)
+        self.salutation = parsed.salutation
+        if parsed.gender:
+            self.gender = parsed.gender
+        if parsed.first_name:
+            self.fname = parsed.first_name
+            self.lname = parsed.last_name
 
     def addOrganisation(self, organisation):
         self.organisation = organisation
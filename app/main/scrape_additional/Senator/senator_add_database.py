@@ -6,47 +6,96 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.
 
 from app import db
 from app.models import SenatorPeople
+from app.names import make_name_key
    
 
-from sqlalchemy import delete
+import sqlalchemy as sa
+
+# SenatorPeople column -> field of a fetched row
+ROW_FIELDS = {
+    "salutation": "salutations",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "gender": "gender",
+    "role": "position",
+    "city": "city",
+    "state": "state",
+    "sector": "sector",
+    "business_phone": "phones",
+    "email": "emails",
+    "profile_url": "source_url",
+}
+SYNC_FIELDS = list(ROW_FIELDS) + ["organization", "country", "name_key"]
+
+
+def stage_rows(rows_json):
+    """Fetched rows as SenatorPeople column values, keyed by profile_url (the first row of a URL wins)."""
+    staged = {}
+    for row in rows_json:
+        values = {column: row.get(field) for column, field in ROW_FIELDS.items()}
+        if not values["profile_url"] or values["profile_url"] in staged:
+            continue
+        values["organization"] = "Parliament of Australia"
+        values["country"] = "Australia"
+        values["name_key"] = make_name_key(values["first_name"], values["last_name"])
+        staged[values["profile_url"]] = values
+    return staged
+
+
+def sync_senators(staged):
+    """
+    Make senator_people match the staged rows, diffed by profile_url: new members are inserted,
+    changed ones updated and departed ones deleted, in one transaction so readers never see
+    a partial or empty table. Returns (inserted, updated, deleted).
+    """
+    current = db.session.execute(
+        sa.select(SenatorPeople.id, *[SenatorPeople.__table__.c[f] for f in SYNC_FIELDS]).order_by(SenatorPeople.id)
+    ).mappings().all()
+
+    existing = {}
+    deletes = []
+    for row in current:
+        if row["profile_url"] in staged and row["profile_url"] not in existing:
+            existing[row["profile_url"]] = row
+        else:
+            deletes.append(row["id"])  # departed, or a duplicate of an earlier row
+
+    inserts = [values for url, values in staged.items() if url not in existing]
+    updates = [
+        {"id": existing[url]["id"], **values}
+        for url, values in staged.items()
+        if url in existing and any(existing[url][f] != values[f] for f in SYNC_FIELDS)
+    ]
+
+    try:
+        if inserts:
+            db.session.execute(sa.insert(SenatorPeople), inserts)
+        if updates:
+            db.session.bulk_update_mappings(SenatorPeople, updates)
+        for i in range(0, len(deletes), 500):
+            db.session.execute(sa.delete(SenatorPeople).where(SenatorPeople.id.in_(deletes[i:i + 500])))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(inserts), len(updates), len(deletes)
+
 
 def senator_add_to_database():
     rows_json = fetch_senators_combined(limit=None, max_workers=10)
 
-   
-    db.session.execute(delete(SenatorPeople))
-    db.session.commit()  
-   
-    n=0
-    for row in rows_json:
+    staged = stage_rows(rows_json)
+    if not staged:
+        # An empty crawl means the site could not be read, not that parliament is empty
+        raise Exception("No senators fetched, senator table left unchanged")
 
-        existing = SenatorPeople.query.filter_by(profile_url=row.get("profile_url")).first()
-        if not existing:
-            s = SenatorPeople(
-                salutation=row.get("salutations"),
-                first_name=row.get("first_name"),
-                last_name=row.get("last_name"),
-                gender=row.get("gender"),
-                role=row.get("position"),
-                organization="Parliament of Australia",
-                city=row.get("city"),
-                state=row.get("state"),
-                country ="Australia",
-                sector=row.get("sector"),
-                business_phone=row.get("phones"),
-                email=row.get("emails"),
-                profile_url=row.get("source_url")
-            )
-            db.session.add(s)
-            n+=1
-
-    db.session.commit() 
-    print(f"Inserted {n} records into senator table.")
+    inserted, updated, deleted = sync_senators(staged)
+    print(f"Senator table synced: {inserted} inserted, {updated} updated, {deleted} deleted, "
+          f"{len(staged) - inserted - updated} unchanged.")
 
 def search_database_for_senator(fname, lname):
     person = SenatorPeople.query.filter_by(
-        first_name=fname,
-        last_name=lname
+        name_key=make_name_key(fname, lname)
     ).first()
 
     if person:
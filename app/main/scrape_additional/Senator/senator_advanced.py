@@ -1,10 +1,14 @@
-import random, re, time, json
+import re, json, functools, queue, threading
 from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional
-from urllib.parse import urlencode
-import urllib.robotparser as robotparser
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from app.main.scrape_additional.Government.constants import POST_NOMINALS, PREFIXES, MALES, FEMALES, STATES
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlencode, urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from app.main.scrape_additional.Government.constants import STATES
+from app.names import parse_name
+from app.main.scrape_additional.http_cache import get_http_cache, ChangeReport
+from app.main.scrape_additional.robots import get_robots_policy
+from app.proxies import RotatingSession, get_proxy_pool
+from app.ratelimit import HostLimiter
 
 import requests
 from bs4 import BeautifulSoup
@@ -13,12 +17,18 @@ from urllib3.util.retry import Retry
 
 BASE = "https://www.aph.gov.au"
 SEARCH_PATH = "/Senators_and_Members/Parliamentarian_Search_Results"
-ROBOTS_URL = f"{BASE}/robots.txt"
 UA = "Perth USAsia Centre/1.0 (+contact: lisa.cluett@perthusasia.edu.au)"
 
+CHAMBERS = [
+    ("House of Representatives", {"mem": 1, "q": 0}),
+    ("Senator", {"sen": 1, "q": 0}),
+]
+REQUESTS_PER_SECOND = 8.0  # shared by every worker, lowered by a Crawl-delay; pages answered by the cache don't count
+MAX_LISTING_PAGES = 50     # safety stop, each chamber has well under this
+
 
 def make_session():
-    s = requests.Session()
+    s = RotatingSession(get_proxy_pool())
     s.headers.update({"User-Agent": UA})
     retries = Retry(
         total=3, backoff_factor=0.6,
@@ -29,17 +39,8 @@ def make_session():
     return s
 
 
-# Load robots.txt once
-rp = robotparser.RobotFileParser()
-rp.set_url("https://www.aph.gov.au/robots.txt")
-rp.read()
-
 def allowed_by_robots(url: str, user_agent: str = UA) -> bool:
-    try:
-        return rp.can_fetch(user_agent, url)
-    except Exception:
-        # fallback for any error
-        return url.startswith("https://www.aph.gov.au/Senators_and_Members/")
+    return get_robots_policy().can_fetch(url, user_agent)
 
 
 @dataclass
@@ -60,8 +61,14 @@ class SenatorRow:
     source_url: Optional[str] = None
 
 
-def polite_sleep(a: float = 0.3, b: float = 1.0):
-    time.sleep(random.uniform(a, b))
+def get_page(session, url: str, limiter: HostLimiter, report: Optional[ChangeReport] = None):
+    """GET through the page cache, waiting for the host's turn unless the page is fresh on disk."""
+    cache = get_http_cache()
+    if not cache.is_fresh(url):
+        limiter.take(url)
+    resp = cache.get(session, url, report=report, timeout=20)
+    resp.raise_for_status()
+    return resp
 
 
 def parse_search_results(html: str) -> List[Dict[str, str]]:
@@ -100,6 +107,22 @@ def parse_search_results(html: str) -> List[Dict[str, str]]:
     return uniq
 
 
+def has_next_page(html: str, page: int) -> Optional[bool]:
+    """Whether the results pager links to the page after `page`, None when the page has no pager."""
+    soup = BeautifulSoup(html, "lxml")
+    pages = set()
+    for a in soup.select("a[href*='page=']"):
+        href = a.get("href") or ""
+        if SEARCH_PATH.lower() not in href.lower() and not href.startswith("?"):
+            continue
+        for value in parse_qs(urlparse(href).query).get("page", []):
+            if value.isdigit():
+                pages.add(int(value))
+    if not pages:
+        return None
+    return page + 1 in pages
+
+
 def parse_profile(html: str) -> Dict[str, Optional[str]]:
     soup = BeautifulSoup(html, "lxml")
     text = soup.get_text("\n", strip=True)
@@ -147,14 +170,12 @@ def parse_profile(html: str) -> Dict[str, Optional[str]]:
         "postal_address": postal
     }
 
-def fetch_profile(session, p, sector: str):
+def fetch_profile(session, p, sector: str, limiter: HostLimiter, report: Optional[ChangeReport] = None):
     profile_url = p["href"]
     if not allowed_by_robots(profile_url):
         return None
 
-    polite_sleep()
-    pr = session.get(profile_url, timeout=20)
-    pr.raise_for_status()
+    pr = get_page(session, profile_url, limiter, report)
 
     details = parse_profile(pr.text)
 
@@ -165,43 +186,19 @@ def fetch_profile(session, p, sector: str):
     else:
         city, state = None, locations[0]
 
-    parts = p["name"].split()
-    parts = [part for part in parts if part.lower() != "the"]  # remove 'the'
-
-    # Salutations extraction
-    salutations = []
-    while parts and parts[0] in PREFIXES:
-        salutations.append(parts.pop(0))
-    
-    # Post-nominals extraction
-    post_noms = []
-    while parts and parts[-1].replace(".", "").upper() in POST_NOMINALS:
-        post_noms.insert(0, parts.pop())
-
-    first_name, last_name = "", ""
-    first_name = parts[0] if parts else ""
-    last_name = " ".join(parts[1:]) if len(parts) > 1 else ""  
-    
-    gender = None
-    for sal in salutations:
-        if sal in MALES:
-            gender = "Male"
-            break
-        elif sal in FEMALES:
-            gender = "Female"
-            break
+    name = parse_name(p["name"])
 
     return SenatorRow(
-        salutations=" ".join(salutations) if salutations else None,
-        gender=gender if gender else None,
-        first_name=first_name,
-        last_name=last_name,
+        salutations=name.salutation,
+        gender=name.gender,
+        first_name=name.first_name,
+        last_name=name.last_name,
         profile_url=profile_url,
         sector=sector,
         party=details.get("party"),
         city=city,
         state=STATES.get(state),
-        position='Member of Senate' if sector=="Senator" else f'Member of House of Representatives',
+        position='Member of Senate' if sector=="Senator" else 'Member of House of Representatives',
         phones=details.get("phones"),
         emails=details.get("emails"),
         postal_address=details.get("postal_address"),
@@ -209,47 +206,96 @@ def fetch_profile(session, p, sector: str):
     )
 
 
-def fetch_senators_combined(limit: Optional[int] = None, max_workers: int = 8) -> List[Dict]:
+def iter_search_results(session, sector_name: str, base_params: Dict, limiter: HostLimiter,
+                        report: Optional[ChangeReport] = None, stop: Optional[threading.Event] = None) -> Iterator[Dict]:
     """
-    Fetch both House of Representatives (mem=1) and Senators (sen=1)
+    Yield the members listed for one chamber, page by page, until the pager has no next page
+    (or a page lists nobody new), so the number of pages follows the size of the chamber.
+    """
+    seen = set()
+    for page in range(1, MAX_LISTING_PAGES + 1):
+        if stop and stop.is_set():
+            return
+        url = BASE + SEARCH_PATH + "?" + urlencode({"page": page, **base_params})
+        print(f"Fetching page {page} of {sector_name}: {url}")
+
+        if not allowed_by_robots(url):
+            print("Blocked by robots for URL:", url)
+            return
+
+        html = get_page(session, url, limiter, report).text
+        new = [p for p in parse_search_results(html) if p["href"] not in seen]
+        if not new:
+            return
+        for p in new:
+            seen.add(p["href"])
+            yield p
+
+        if has_next_page(html, page) is False:
+            return
+
+
+def iter_senators(limit: Optional[int] = None, max_workers: int = 8,
+                  report: Optional[ChangeReport] = None) -> Iterator[SenatorRow]:
+    """
+    Stream the members of both chambers. Listing pages are read in a background thread and each
+    member is handed straight to one long-lived pool of profile workers, so profiles are fetched
+    while later listing pages are still coming in. All requests share one per-host pace.
     """
     session = make_session()
-    rows: List[SenatorRow] = []
-
-    for sector_type in [("House of Representatives", {"mem": 1, "q": 0}),
-                        ("Senator", {"sen": 1, "q": 0})]:
-
-        sector_name, base_params = sector_type
-        max_pages = 13 if sector_name == "House of Representatives" else 7
-
-        for page in range(1, max_pages + 1):
-            params = {"page": page, **base_params}
-            url = BASE + SEARCH_PATH + "?" + urlencode(params)
-            print(f"Fetching page {page} of {sector_name}: {url}")
-
-            if not allowed_by_robots(url):
-                print("Blocked by robots for URL:", url)
+    limiter = HostLimiter(REQUESTS_PER_SECOND, delay_for=functools.partial(get_robots_policy().crawl_delay, user_agent=UA))
+    results = queue.Queue()  # finished profile futures, then ("listed", count, error)
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def list_members():
+        submitted, error = 0, None
+        try:
+            for sector_name, base_params in CHAMBERS:
+                for p in iter_search_results(session, sector_name, base_params, limiter, report, stop):
+                    future = executor.submit(fetch_profile, session, p, sector_name, limiter, report)
+                    future.add_done_callback(results.put)
+                    submitted += 1
+        except Exception as e:
+            error = e
+        finally:
+            results.put(("listed", submitted, error))
+
+    lister = threading.Thread(target=list_members, daemon=True)
+    lister.start()
+    try:
+        listed, received, yielded = None, 0, 0
+        while listed is None or received < listed:
+            item = results.get()
+            if isinstance(item, tuple):
+                _, listed, error = item
+                if error:
+                    raise error
+                continue
+            received += 1
+            try:
+                row = item.result()
+            except Exception as e:
+                print("Error fetching profile:", e)
                 continue
+            if row:
+                yield row
+                yielded += 1
+                if limit and yielded >= limit:
+                    return
+    finally:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
-            polite_sleep()
-            resp = session.get(url, timeout=20)
-            resp.raise_for_status()
-
-            pairs = parse_search_results(resp.text)
-
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {executor.submit(fetch_profile, session, p, sector_name): p for p in pairs}
-                for future in as_completed(futures):
-                    try:
-                        row = future.result()
-                        if row:
-                            rows.append(row)
-                            if limit and len(rows) >= limit:
-                                return [asdict(r) for r in rows]
-                    except Exception as e:
-                        print("Error fetching profile:", e)
-
-    return [asdict(r) for r in rows]
+
+def fetch_senators_combined(limit: Optional[int] = None, max_workers: int = 8) -> List[Dict]:
+    """
+    Fetch both House of Representatives (mem=1) and Senators (sen=1)
+    """
+    report = ChangeReport()
+    rows = [asdict(r) for r in iter_senators(limit, max_workers, report)]
+    print(f"Pages: {report.summary()}")
+    return rows
 
 
 def main():
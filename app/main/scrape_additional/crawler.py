@@ -0,0 +1,129 @@
+import asyncio
+import functools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+from urllib.parse import urljoin, urlparse
+
+from app.ratelimit import HostLimiter
+
+
+@dataclass
+class CrawlRequest:
+    """
+    A page to crawl. handler(response, **context) runs in a worker thread and
+    returns (results, follow_up_requests).
+    dedupe: skip the request when the URL is already in the frontier.
+    on_error(**context), if given, is called the same way when the page cannot be fetched.
+    """
+    url: str
+    handler: Callable
+    context: dict = field(default_factory=dict)
+    dedupe: bool = True
+    on_error: Optional[Callable] = None
+
+
+def normalise_url(url: str) -> str:
+    """
+    Normalize URL by:
+    - Lowercasing
+    - Removing trailing slashes
+    - Removing fragments
+    """
+    parsed = urlparse(url)
+    normalized = parsed._replace(fragment="") # Remove #fragment
+    path = normalized.path.rstrip("/") # Remove trailing slash
+    return urljoin(f"{normalized.scheme}://{normalized.netloc}", path).lower()
+
+
+class Crawler:
+    """
+    asyncio crawl engine with one URL frontier shared by every page type.
+    `fetch(url)` is a blocking function returning a response or None, it runs in a thread.
+    `is_cached(url)`, when given, lets pages the fetcher can answer locally skip the per-host budget.
+    `delay_for(url)`, when given, returns a host's Crawl-delay, which then caps its request rate.
+    Every page is scheduled on its own, so the crawl is bounded by the per-host budget
+    (concurrency and requests per second) rather than by chains of dependent pages.
+    """
+
+    def __init__(self, fetch, concurrency=16, per_host=4, per_host_rate=5.0, is_cached=None, delay_for=None):
+        self.fetch = fetch
+        self.is_cached = is_cached
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.per_host_rate = per_host_rate
+        self.frontier = asyncio.Queue()
+        self.seen = set()
+        self.results = []
+        self.host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self.limiter = HostLimiter(per_host_rate, per_host, delay_for)
+        self.executor = None
+        self.fetched = 0
+        self.failed = 0
+        self.errors = 0   # requests whose handler raised, their follow-ups were never scheduled
+
+    async def in_thread(self, fn, *args, **kwargs):
+        # Own executor: the default one is sized by CPU count, too small for blocking fetches
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    def add(self, request: CrawlRequest):
+        """Schedule a request unless its URL was already scheduled. Returns True when added."""
+        if request.dedupe:
+            key = normalise_url(request.url)
+            if key in self.seen:
+                return False
+            self.seen.add(key)
+        self.frontier.put_nowait(request)
+        return True
+
+    async def fetch_politely(self, url):
+        if self.is_cached and self.is_cached(url):
+            return await self.in_thread(self.fetch, url)
+        host = urlparse(url).netloc
+        bucket = self.limiter.buckets.get(host) or await self.in_thread(self.limiter.bucket, url)
+        async with self.host_slots[host]:
+            await asyncio.sleep(bucket.reserve())
+            return await self.in_thread(self.fetch, url)
+
+    async def process(self, request):
+        response = await self.fetch_politely(request.url)
+        if response is None:
+            self.failed += 1
+            if not request.on_error:
+                return
+            results, follow_ups = request.on_error(**request.context)
+        else:
+            self.fetched += 1
+            results, follow_ups = await self.in_thread(request.handler, response, **request.context)
+        self.results.extend(results)
+        for follow_up in follow_ups:
+            self.add(follow_up)
+
+    async def worker(self):
+        while True:
+            request = await self.frontier.get()
+            try:
+                await self.process(request)
+            except Exception as e:
+                self.failed += 1
+                self.errors += 1
+                print(f"Crawl failed for {request.url}: {e}")
+            finally:
+                self.frontier.task_done()
+
+    async def crawl(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        workers = [asyncio.create_task(self.worker()) for _ in range(self.concurrency)]
+        try:
+            await self.frontier.join()
+        finally:
+            for w in workers:
+                w.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.executor.shutdown(wait=False)
+        return self.results
+
+    def run(self):
+        """Crawl until the frontier is empty and return every handler result."""
+        return asyncio.run(self.crawl())
@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_DIR = "http_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # compressed bodies kept on disk
+
+# (URL pattern, seconds a cached page is served without asking the server), first match wins.
+# After that the page is revalidated with If-None-Match / If-Modified-Since.
+DEFAULT_TTLS = [
+    (r"directory\.gov\.au/commonwealth-entities-and-companies", 6 * 3600),
+    (r"directory\.gov\.au/", 24 * 3600),
+    (r"aph\.gov\.au/Senators_and_Members/Parliamentarian_Search_Results", 6 * 3600),
+    (r"aph\.gov\.au/Senators_and_Members/Parliamentarian\?", 24 * 3600),
+]
+DEFAULT_TTL = 0
+
+
+class ChangeReport:
+    """What one refresh found: pages that are new or changed, and how many were unchanged."""
+
+    def __init__(self):
+        self.new = []
+        self.changed = []
+        self.not_modified = 0  # revalidated with a 304
+        self.unchanged = 0     # downloaded again, same content
+        self.cached = 0        # served within their TTL, no request made
+        self.lock = threading.Lock()
+
+    def record(self, url, outcome):
+        with self.lock:
+            if outcome == "new":
+                self.new.append(url)
+            elif outcome == "changed":
+                self.changed.append(url)
+            else:
+                setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def summary(self):
+        return (f"{len(self.new)} new, {len(self.changed)} changed, "
+                f"{self.not_modified + self.unchanged + self.cached} unchanged "
+                f"({self.cached} from cache, {self.not_modified} not modified)")
+
+
+class HttpCache:
+    """
+    On-disk cache for GET requests. Bodies are stored gzip-compressed under their sha256,
+    so identical pages share one file; an sqlite index maps URLs to bodies and validators.
+    Once a URL's TTL has passed it is revalidated with a conditional GET. The least recently
+    used bodies are evicted when the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, ttls=None, default_ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls)]
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "index.sqlite3"), check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS entry (
+                url TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                content_type TEXT,
+                encoding TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_entry_hash ON entry (hash);
+            CREATE TABLE IF NOT EXISTS object (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_object_last_access ON object (last_access);
+        """)
+        self.db.commit()
+
+    def ttl_for(self, url):
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest + ".gz")
+
+    def lookup(self, url):
+        with self.lock:
+            return self.db.execute(
+                "SELECT hash, etag, last_modified, content_type, encoding, expires_at FROM entry WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+    def is_fresh(self, url):
+        """True when get() would answer from disk without a request."""
+        entry = self.lookup(url)
+        return bool(entry) and entry[5] > time.time()
+
+    def read_body(self, digest):
+        try:
+            with gzip.open(self.object_path(digest), "rb") as f:
+                body = f.read()
+        except OSError:
+            return None
+        with self.lock:
+            self.db.execute("UPDATE object SET last_access = ? WHERE hash = ?", (time.time(), digest))
+            self.db.commit()
+        return body
+
+    def store(self, url, response, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self.object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp, path)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO object (hash, size, last_access) VALUES (?, ?, ?) "
+                "ON CONFLICT (hash) DO UPDATE SET last_access = excluded.last_access",
+                (digest, os.path.getsize(path), now)
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO entry VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 response.headers.get("Content-Type"), response.encoding, now, now + self.ttl_for(url))
+            )
+            self.db.commit()
+        self.evict()
+        return digest
+
+    def touch(self, url, response):
+        """Extend a revalidated entry, keeping any validators the 304 did not repeat."""
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "UPDATE entry SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "fetched_at = ?, expires_at = ? WHERE url = ?",
+                (response.headers.get("ETag"), response.headers.get("Last-Modified"),
+                 now, now + self.ttl_for(url), url)
+            )
+            self.db.commit()
+
+    def evict(self):
+        """Delete the least recently used bodies, and the entries pointing at them, until under max_bytes."""
+        with self.lock:
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM object").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for digest, size in self.db.execute("SELECT hash, size FROM object ORDER BY last_access").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.db.execute("DELETE FROM entry WHERE hash = ?", (digest,))
+                self.db.execute("DELETE FROM object WHERE hash = ?", (digest,))
+                try:
+                    os.remove(self.object_path(digest))
+                except OSError:
+                    pass
+                total -= size
+            self.db.commit()
+
+    def cached_response(self, url, entry, body, status_code=200):
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = url
+        response._content = body
+        response.encoding = entry[4]
+        response.headers = CaseInsensitiveDict({"Content-Type": entry[3] or ""})
+        response.from_cache = True
+        return response
+
+    def get(self, session, url, report=None, **kwargs):
+        """
+        GET through the cache with a requests session. Returns a requests.Response
+        (from_cache=True when the body came from disk). Error responses are returned, not cached.
+        """
+        entry = self.lookup(url)
+        body = self.read_body(entry[0]) if entry else None
+        if entry and body is None:
+            entry = None  # body was evicted or lost
+
+        if entry and entry[5] > time.time():
+            if report:
+                report.record(url, "cached")
+            return self.cached_response(url, entry, body)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry[1]:
+                headers["If-None-Match"] = entry[1]
+            if entry[2]:
+                headers["If-Modified-Since"] = entry[2]
+        response = session.get(url, headers=headers, **kwargs)
+
+        if entry and response.status_code == 304:
+            self.touch(url, response)
+            if report:
+                report.record(url, "not_modified")
+            return self.cached_response(url, entry, body)
+
+        if response.status_code != 200:
+            return response
+
+        digest = self.store(url, response, response.content)
+        if report:
+            if not entry:
+                report.record(url, "new")
+            elif digest != entry[0]:
+                report.record(url, "changed")
+            else:
+                report.record(url, "unchanged")
+        response.from_cache = False
+        return response
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """The process-wide page cache, in HTTP_CACHE_DIR (default ./http_cache) holding up to HTTP_CACHE_MAX_MB."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            max_mb = os.getenv("HTTP_CACHE_MAX_MB")
+            _cache = HttpCache(
+                directory=os.getenv("HTTP_CACHE_DIR") or DEFAULT_CACHE_DIR,
+                max_bytes=int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES,
+            )
+        return _cache
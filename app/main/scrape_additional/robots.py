@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+import time
+import urllib.robotparser as robotparser
+from urllib.parse import urlparse
+
+import requests
+
+from app.main.scrape_additional.http_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_TTL = 24 * 3600  # seconds a host's robots.txt is trusted before it is fetched again
+ERROR_TTL = 15 * 60      # robots.txt could not be read, try again sooner
+FETCH_TIMEOUT = 10
+
+
+class RobotsPolicy:
+    """
+    robots.txt rules for every host the scrapers visit. A host's robots.txt is fetched the first
+    time one of its URLs is checked, then kept in memory and in a JSON file shared by processes,
+    so it is fetched once per TTL. Nothing is fetched before the first check.
+    Unreadable robots.txt: 401/403 disallow everything, other 4xx allow everything,
+    5xx and network errors disallow everything until ERROR_TTL has passed.
+    """
+
+    def __init__(self, path=os.path.join(DEFAULT_CACHE_DIR, "robots.json"), ttl=DEFAULT_TTL, user_agent="*"):
+        self.path = path
+        self.ttl = ttl
+        self.user_agent = user_agent
+        self.parsers = {}  # host -> (RobotFileParser, expires_at)
+        self.lock = threading.Lock()
+        self.host_locks = {}
+
+    def host_lock(self, host):
+        with self.lock:
+            return self.host_locks.setdefault(host, threading.Lock())
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self, host, entry):
+        with self.lock:
+            entries = self.load()
+            entries[host] = entry
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+
+    def fetch(self, origin):
+        """Download robots.txt, returning the entry stored for the host."""
+        now = time.time()
+        try:
+            response = requests.get(f"{origin}/robots.txt", headers={"User-Agent": self.user_agent},
+                                    timeout=FETCH_TIMEOUT)
+            status, body = response.status_code, response.text if response.status_code < 400 else ""
+        except requests.RequestException as e:
+            print(f"Could not read {origin}/robots.txt: {e}")
+            status, body = None, ""
+        ttl = self.ttl if status is not None and status < 500 else ERROR_TTL
+        return {"status": status, "body": body, "fetched_at": now, "expires_at": now + ttl}
+
+    @staticmethod
+    def build_parser(entry):
+        parser = robotparser.RobotFileParser()
+        status = entry["status"]
+        if status in (401, 403) or status is None or status >= 500:
+            parser.disallow_all = True
+        elif status >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(entry["body"].splitlines())
+        return parser
+
+    def rules(self, url):
+        """The RobotFileParser for the URL's host, from memory, disk or the host itself."""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        cached = self.parsers.get(host)
+        if cached and cached[1] > time.time():
+            return cached[0]
+
+        with self.host_lock(host):
+            cached = self.parsers.get(host)
+            if cached and cached[1] > time.time():
+                return cached[0]  # fetched by another thread while we waited
+            entry = self.load().get(host)
+            if not entry or entry["expires_at"] <= time.time():
+                entry = self.fetch(f"{parsed.scheme}://{parsed.netloc}")
+                self.save(host, entry)
+            parser = self.build_parser(entry)
+            self.parsers[host] = (parser, entry["expires_at"])
+            return parser
+
+    def can_fetch(self, url, user_agent=None):
+        return self.rules(url).can_fetch(user_agent or self.user_agent, url)
+
+    def crawl_delay(self, url, user_agent=None):
+        """Seconds to leave between requests to the URL's host, from Crawl-delay or Request-rate. None if unset."""
+        parser = self.rules(url)
+        agent = user_agent or self.user_agent
+        delay = parser.crawl_delay(agent)
+        rate = parser.request_rate(agent)
+        if rate and rate.requests:
+            delay = max(float(delay or 0), rate.seconds / rate.requests)
+        return float(delay) if delay else None
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_robots_policy():
+    """The process-wide robots policy, kept in HTTP_CACHE_DIR/robots.json for ROBOTS_TTL_HOURS (default 24)."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            ttl_hours = os.getenv("ROBOTS_TTL_HOURS")
+            _policy = RobotsPolicy(
+                path=os.path.join(os.getenv("HTTP_CACHE_DIR") or DEFAULT_CACHE_DIR, "robots.json"),
+                ttl=float(ttl_hours) * 3600 if ttl_hours else DEFAULT_TTL,
+            )
+        return _policy
@@ -0,0 +1,89 @@
+import sqlalchemy as sa
+from app import db
+from app.models import People, Log, INTERNAL_COLUMNS
+from app.matching import NameIndex
+from app.dedupe import fan_out
+from app.progress import set_progress_total, add_log_details
+from app.provenance import needs_refresh, record_fields
+
+BATCH_SIZE = 1000
+
+
+def load_reference(reference_model):
+    """Load a reference table into a dict keyed on name_key (first match wins, like search_database)."""
+    columns = [c for c in reference_model.__table__.columns if c.name not in INTERNAL_COLUMNS]
+    query = sa.select(reference_model.name_key, *columns).order_by(reference_model.id)
+    if hasattr(reference_model, "removed_at"):
+        query = query.where(reference_model.removed_at.is_(None))  # tombstoned rows
+    rows = db.session.execute(query).mappings()
+
+    reference = {}
+    for row in rows:
+        row = dict(row)
+        reference.setdefault(row.pop("name_key"), row)
+    return reference
+
+
+def enrich_people(log_id, reference_model, fields, source, not_found_detail, job_source,
+                  after_id=0, on_checkpoint=None):
+    """
+    Match every People row with id > after_id against reference_model in a single pass and copy `fields` across.
+    Names without an exact name_key match are looked up fuzzily (nicknames, spelling, double-barrelled surnames).
+    Only canonical rows are matched, their duplicates get the same updates. Rows whose `fields` job_source
+    confirmed recently enough (FIELD_FRESH_DAYS) are skipped, the fields written are recorded in PeopleField.
+    Updates and LogDetail rows are written in batches of BATCH_SIZE, on_checkpoint(last_id) is called after each.
+    Returns (updated, total) for the rows processed in this run.
+    """
+    reference = load_reference(reference_model)
+    index = NameIndex(reference.values())
+    started_at = db.session.get(Log, log_id).created_at
+    planned = sa.and_(People.canonical_id.is_(None), needs_refresh(job_source, fields, started_at))
+    people = db.session.execute(
+        sa.select(People.id, People.first_name, People.last_name, People.organization, People.name_key)
+        .where(People.id > after_id, planned)
+        .order_by(People.id)
+    ).all()
+    done = db.session.scalar(sa.select(sa.func.count(People.id)).where(People.id <= after_id, planned))
+    set_progress_total(log_id, done + len(people))
+    if not after_id:
+        skipped = db.session.scalar(sa.select(sa.func.count(People.id)).where(People.canonical_id.is_(None))) - len(people)
+        print(f"{job_source}: {len(people)} records to match, {skipped} still fresh")
+
+    updated = 0
+    for i in range(0, len(people), BATCH_SIZE):
+        updates = []
+        details = []
+        for person in people[i:i + BATCH_SIZE]:
+            record_name = f'{person.first_name} {person.last_name}'
+            match = reference.get(person.name_key)
+            match_source = source
+            if not match:
+                fuzzy = index.match(person.first_name, person.last_name, person.organization)
+                if fuzzy:
+                    match, score = fuzzy
+                    match_source = f"{source} (fuzzy match {score:.2f})"
+            if match:
+                updates.append({"id": person.id, **{field: match.get(field) for field in fields}})
+                details.append({
+                    "record_name": record_name,
+                    "status": "success",
+                    "source": match_source,
+                    "detail": f'{match}'
+                })
+            else:
+                details.append({
+                    "record_name": record_name,
+                    "status": "error",
+                    "source": "N/A",
+                    "detail": not_found_detail
+                })
+
+        if updates:
+            db.session.bulk_update_mappings(People, updates + fan_out(updates))
+            record_fields(job_source, updates)
+        add_log_details(log_id, details)  # commits the batch
+        updated += len(updates)
+        if on_checkpoint:
+            on_checkpoint(people[min(i + BATCH_SIZE, len(people)) - 1].id)
+
+    return updated, len(people)
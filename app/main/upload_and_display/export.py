@@ -0,0 +1,46 @@
+import csv
+import json
+from io import StringIO
+import sqlalchemy as sa
+from app import db
+from app.models import People, INTERNAL_COLUMNS
+
+EXPORT_COLUMNS = [c for c in People.__table__.columns if c.name not in INTERNAL_COLUMNS]
+STREAM_BATCH_SIZE = 1000
+
+
+def iter_people_rows(batch_size=STREAM_BATCH_SIZE):
+    """Yield People rows as plain tuples, `batch_size` at a time, through a server-side cursor."""
+    result = db.session.execute(
+        sa.select(*EXPORT_COLUMNS)
+        .order_by(People.id)
+        .execution_options(yield_per=batch_size)
+    )
+    try:
+        for rows in result.partitions():
+            yield rows
+    finally:
+        result.close()
+
+
+def generate_people_csv():
+    """Yield the People table as CSV text, one chunk per batch of rows."""
+    buffer = StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow([c.name for c in EXPORT_COLUMNS])  # header row
+
+    for rows in iter_people_rows():
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():  # header only when the table is empty
+        yield buffer.getvalue()
+
+
+def generate_people_ndjson():
+    """Yield the People table as newline-delimited JSON, one object per row."""
+    names = [c.name for c in EXPORT_COLUMNS]
+    for rows in iter_people_rows():
+        yield "".join(json.dumps(dict(zip(names, row))) + "\n" for row in rows)
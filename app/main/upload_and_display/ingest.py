@@ -0,0 +1,61 @@
+import io
+import pandas as pd
+from charset_normalizer import detect
+
+ENCODING_SAMPLE_SIZE = 64 * 1024  # bytes used to guess the encoding
+CHUNK_SIZE = 5000                 # rows parsed and inserted at a time
+
+
+class NullByteStripper(io.RawIOBase):
+    """Read-only stream wrapper that drops NULL bytes as the file is read."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            data = self.raw.read(len(buffer))
+            if not data:
+                return 0
+            data = data.replace(b'\x00', b'')
+            if data:  # a block can be nothing but NULL bytes
+                break
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def detect_encoding(stream) -> str:
+    """Guess the encoding from the start of the file, default to utf-8-sig to handle BOM."""
+    sample = stream.read(ENCODING_SAMPLE_SIZE).replace(b'\x00', b'')
+    stream.seek(0)
+
+    # Cut at the last newline so a multi-byte character is never split
+    if len(sample) == ENCODING_SAMPLE_SIZE and b'\n' in sample:
+        sample = sample[:sample.rindex(b'\n') + 1]
+
+    detected = detect(sample)
+    return detected.get('encoding', 'utf-8-sig') or 'utf-8-sig'
+
+
+def read_csv_chunks(stream, chunksize=CHUNK_SIZE):
+    """Parse an uploaded CSV lazily, `chunksize` rows at a time. All values are read as text."""
+    encoding = detect_encoding(stream)
+    text_file = io.TextIOWrapper(io.BufferedReader(NullByteStripper(stream)), encoding=encoding, newline='')
+    return pd.read_csv(text_file, engine="c", dtype=str, chunksize=chunksize)
+
+
+def map_columns(df, field_mapping):
+    """Rename CSV headers to People columns, add missing ones and turn NaN into None."""
+    df = df[[col for col in df.columns if col in field_mapping]]
+    df = df.rename(columns=field_mapping)
+
+    # Add missing columns
+    for expected_col in field_mapping.values():
+        if expected_col not in df.columns:
+            df[expected_col] = ""
+
+    df = df.astype(object)
+    return df.where(df.notna(), None)
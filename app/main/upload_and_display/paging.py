@@ -0,0 +1,112 @@
+import base64
+import json
+import threading
+import time
+import sqlalchemy as sa
+from app import db
+from app.models import People
+from app.main.upload_and_display.export import EXPORT_COLUMNS
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+COUNT_CACHE_TTL = 60  # seconds
+
+SORTABLE_COLUMNS = {c.name: c for c in EXPORT_COLUMNS}
+# Only indexed columns can be filtered, so every filter is an index range scan
+FILTERABLE_COLUMNS = {c.name: c for c in EXPORT_COLUMNS if c.index}
+
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return value, int(row_id)
+
+
+def filter_conditions(filters):
+    """
+    Case-insensitive prefix match on each filtered column, written as a range on lower(column)
+    so its ix_people_<column>_lower expression index is used.
+    """
+    conditions = []
+    for name, value in sorted(filters.items()):
+        column = sa.func.lower(FILTERABLE_COLUMNS[name])
+        value = value.lower()
+        conditions.append(column >= value)
+        conditions.append(column < value + "\uffff")
+    return conditions
+
+
+def after_cursor(column, descending, value, row_id):
+    """Rows that come after (value, row_id) in the page order. NULLs sort first ascending, last descending."""
+    if not descending:
+        if value is None:
+            return sa.or_(sa.and_(column.is_(None), People.id > row_id), column.isnot(None))
+        return sa.or_(column > value, sa.and_(column == value, People.id > row_id))
+
+    if value is None:
+        return sa.and_(column.is_(None), People.id < row_id)
+    return sa.or_(column < value, sa.and_(column == value, People.id < row_id), column.is_(None))
+
+
+def count_people(filters):
+    """Total rows for a filter set, cached per filter signature for COUNT_CACHE_TTL seconds."""
+    signature = tuple(sorted(filters.items()))
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(signature)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    total = db.session.scalar(
+        sa.select(sa.func.count(People.id)).where(*filter_conditions(filters))
+    )
+    with _count_cache_lock:
+        _count_cache[signature] = (total, now + COUNT_CACHE_TTL)
+    return total
+
+
+def invalidate_count_cache():
+    """Call after People rows are inserted, deleted or have filterable columns changed."""
+    with _count_cache_lock:
+        _count_cache.clear()
+
+
+def get_people_page(sort="id", descending=False, filters=None, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of People using keyset pagination on (sort column, id).
+    Returns rows, the cursor for the next page (None on the last page) and the filtered total.
+    """
+    filters = filters or {}
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    column = People.id if sort == "id" else SORTABLE_COLUMNS[sort]
+
+    query = sa.select(People.id, *EXPORT_COLUMNS).where(*filter_conditions(filters))
+    if cursor:
+        value, row_id = decode_cursor(cursor)
+        if sort == "id":
+            query = query.where(People.id < row_id if descending else People.id > row_id)
+        else:
+            query = query.where(after_cursor(column, descending, value, row_id))
+
+    if sort == "id":
+        order = [People.id.desc() if descending else People.id]
+    elif descending:
+        order = [column.desc().nulls_last(), People.id.desc()]
+    else:
+        order = [column.asc().nulls_first(), People.id]
+
+    rows = db.session.execute(query.order_by(*order).limit(limit + 1)).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["id"] if sort == "id" else last[sort], last["id"])
+
+    return [dict(r) for r in rows], next_cursor, count_people(filters)
@@ -1,23 +1,25 @@
 from app.main.upload_and_display import ud
-from flask import render_template,flash, redirect,url_for,request, jsonify,send_file,current_app
+from flask import render_template,flash, redirect,url_for,request, jsonify,current_app, Response, stream_with_context
 import sqlalchemy as sa
 from app import db
-from app.models import People, Log, LogDetail, GovPeople, SenatorPeople
+from app.models import People, PeopleField, Log, LogDetail, GovPeople, SenatorPeople
 from app.main.forms import UploadForm
 from flask_login import current_user, login_required
-import pandas as pd
-from charset_normalizer import detect
 from requests.exceptions import RequestException
-from io import TextIOWrapper, BytesIO
 from flask_mail import Message, Mail
-from threading import Thread
 from app.main.scrape.helper.scrape_information import scrape_and_update_people
-import io
-from io import StringIO
-import csv
-from app.main.scrape_additional.Government.gov_database import search_database
+from app.main.upload_and_display.enrichment import enrich_people
+from app.events import stream_log_events, publish_status
+from app.jobs import enqueue_job, register_handler, ensure_embedded_workers
+from app.main.upload_and_display.ingest import read_csv_chunks, map_columns
+from app.dedupe import resolve_duplicates
+from app.names import name_keys
+from app.main.upload_and_display.export import generate_people_csv, generate_people_ndjson
+from app.main.upload_and_display.paging import (
+    get_people_page, invalidate_count_cache, SORTABLE_COLUMNS, FILTERABLE_COLUMNS, DEFAULT_PAGE_SIZE
+)
 from app.main.scrape_additional.Government.gov_scraper import update_gov_database
-from app.main.scrape_additional.Senator.senator_add_database import senator_add_to_database, search_database_for_senator
+from app.main.scrape_additional.Senator.senator_add_database import senator_add_to_database
 
 field_mapping = {
             "FirstName": "first_name",
@@ -50,68 +52,111 @@ def upload():
     
     file = request.files.get("file")
 
-    # Read the file content and remove NULL bytes
-    file_content = file.read().replace(b'\x00', b'')
-    
-    # Detect file encoding, default to utf-8-sig to handle BOM
-    detected = detect(file_content)
-    encoding = detected.get('encoding', 'utf-8-sig') or 'utf-8-sig'
+    # Progress record, updated after every chunk
+    log = Log(status="in progress", result="Upload started")
+    db.session.add(log)
+    db.session.commit()
 
-    text_file = TextIOWrapper(BytesIO(file_content), encoding=encoding)
+    total = 0
     try:
-        df = pd.read_csv(text_file, engine="c")
-        df.columns = df.columns.str.strip()
-        df_cols = set(df.columns)
-        expected_cols = set(field_mapping.keys())
-        extra_cols = df_cols - expected_cols   # columns in df but not in field_mapping
-        missing_cols = expected_cols - df_cols # columns in field_mapping but not in df
-
-        if extra_cols:
-            flash(f"Unexpected columns in CSV: {extra_cols}. Expected columns are: {expected_cols}", "danger")
-
-        if missing_cols:
-            flash(f"Missing columns in CSV: {missing_cols}. Expected columns are: {expected_cols}", "danger")
+        for i, chunk in enumerate(read_csv_chunks(file.stream)):
+            chunk.columns = chunk.columns.str.strip()
+
+            if i == 0:
+                df_cols = set(chunk.columns)
+                expected_cols = set(field_mapping.keys())
+                extra_cols = df_cols - expected_cols   # columns in df but not in field_mapping
+                missing_cols = expected_cols - df_cols # columns in field_mapping but not in df
+
+                if extra_cols:
+                    flash(f"Unexpected columns in CSV: {extra_cols}. Expected columns are: {expected_cols}", "danger")
+
+                if missing_cols:
+                    flash(f"Missing columns in CSV: {missing_cols}. Expected columns are: {expected_cols}", "danger")
+
+                # Validate required fields
+                required_fields = ["FirstName", "LastName"]
+                for field in required_fields:
+                    if field not in df_cols:
+                        log.status = "error"
+                        log.result = f"Upload failed: missing required column {field}"
+                        db.session.commit()
+                        flash(f"Missing required column: {field_mapping[field]}", "error")
+                        return redirect(url_for("main.workspace"))
+
+                # Clear before the first insert
+                db.session.query(PeopleField).delete()
+                db.session.query(People).delete()
+
+            people = map_columns(chunk, field_mapping)
+            people["name_key"] = name_keys(people["first_name"], people["last_name"])
+            people = people.to_dict(orient="records")
+            if people:
+                db.session.execute(sa.insert(People), people)
+            total += len(people)
+
+            log.result = f"Uploaded {total} people"
+            db.session.commit()
 
-        df = df[[col for col in df.columns if col in field_mapping]]
-        df = df.rename(columns=field_mapping)
-        
-        # Validate required fields
-        required_fields = ["first_name", "last_name"]
-        for field in required_fields:
-            if field not in df.columns:
-                flash(f"Missing required column: {field}", "error")
-                return redirect(url_for("main.workspace"))
-            
-        # Add missing columns
-        for expected_col in field_mapping.values():
-            if expected_col not in df.columns:
-                df[expected_col] = "" 
-
-        people = df.to_dict(orient="records")
-
-        # Clear and insert
-        db.session.query(People).delete()
-        for person in people:
-            db.session.execute(
-                sa.insert(People).values(**person)
-            )
+        duplicates = resolve_duplicates()
+        log.status = "completed"
+        log.result = f"Uploaded {total} people, {duplicates} duplicates"
         db.session.commit()
+        invalidate_count_cache()
 
-        flash(f"Uploaded {len(people)} people successfully!", "success")
+        flash(f"Uploaded {total} people successfully! {duplicates} duplicates will share their results.", "success")
         return redirect(url_for("upload_and_display.excel_display")) 
 
     except Exception as e:
+        db.session.rollback()
+        db.session.query(PeopleField).delete()
         db.session.query(People).delete()
+        log.status = "error"
+        log.result = f"Upload failed: {str(e)}"[:128]
         db.session.commit()
+        invalidate_count_cache()
         flash(f"Upload failed: {str(e)}", "error")
         return redirect(url_for("main.workspace"))
     
 @ud.route("/data", methods=["GET"])
 @login_required
 def get_data():
-    people = db.session.query(People).all()
-    data = [p.as_dict() for p in people]  
-    return jsonify(data)
+    # One JSON object per line, streamed as rows are read
+    return Response(stream_with_context(generate_people_ndjson()), mimetype="application/x-ndjson")
+
+@ud.route("/data/page", methods=["GET"])
+@login_required
+def get_data_page():
+    """
+    One page of the grid.
+    Query args: sort, dir (asc/desc), cursor (from the previous page), limit, filter[<column>] (prefix match)
+    """
+    sort = request.args.get("sort", "id")
+    if sort != "id" and sort not in SORTABLE_COLUMNS:
+        return jsonify({"error": f"Cannot sort by {sort}"}), 400
+
+    filters = {}
+    for arg, value in request.args.items():
+        if arg.startswith("filter[") and arg.endswith("]") and value:
+            column = arg[len("filter["):-1]
+            if column not in FILTERABLE_COLUMNS:
+                return jsonify({"error": f"Cannot filter by {column}. Filterable columns are: {list(FILTERABLE_COLUMNS)}"}), 400
+            filters[column] = value
+
+    try:
+        rows, next_cursor, total = get_people_page(
+            sort=sort,
+            descending=request.args.get("dir") == "desc",
+            filters=filters,
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+        )
+    except (ValueError, TypeError):
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    return jsonify({"rows": rows, "next_cursor": next_cursor, "total": total})
+
+UPDATE_SOURCES = ("linkedin", "gw", "senator")
 
 @ud.route("/update",methods=["POST"])
 @login_required
@@ -122,18 +167,18 @@ def update():
     limit = int(payload.get("limit")) if payload.get("limit") else 20
     print("limit:", limit)
 
-    log = Log(status="in progress")
-    db.session.add(log)
-    db.session.commit()
     if not source or not data:
         return jsonify({"status": "error", "error": "Missing source or data"}), 400
-    user_email = current_user.email
-    app = current_app._get_current_object()
+    if source not in UPDATE_SOURCES:
+        return jsonify({"status": "error", "error": "Invalid source"}), 400
 
-    thread = Thread(target=process_update_task, args=(app, user_email, source, log.id, limit))
-    thread.start()
+    # Queued in the job table and run by the worker pool (app/jobs.py),
+    # an identical job that is still pending is returned instead of a new one
+    params = {"limit": limit} if source == "linkedin" else {}
+    job = enqueue_job(source, params, current_user.email)
+    ensure_embedded_workers(current_app._get_current_object())
 
-    return jsonify({"status": "success", "log_id": log.id}), 202
+    return jsonify({"status": "success", "log_id": job.log_id, "job_id": job.id}), 202
 
 # Invert the dictionary to map DB fields back to original headers
 inverse_field_mapping = {v: k for k, v in field_mapping.items()}
@@ -141,206 +186,109 @@ inverse_field_mapping = {v: k for k, v in field_mapping.items()}
 @ud.route("/export", methods=["GET"])
 @login_required
 def export_data():
-    people = db.session.query(People).all()
-    df = pd.DataFrame([p.as_dict() for p in people])
-
-    output = StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-
-    
-    bytes_output = BytesIO(output.getvalue().encode("utf-8"))
-    return send_file(
-        bytes_output,
-        download_name="people.csv",
-        as_attachment=True,
-        mimetype="text/csv"
+    return Response(
+        stream_with_context(generate_people_csv()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=people.csv"}
     )
 
-def process_gw(log_id):
-    people_records = db.session.query(People).all() # Fetch all records in CSV
-    gov_people_records = db.session.query(GovPeople).all() # Fetch all records from GovPeople
+GW_FIELDS = ["salutation", "organization", "role", "gender", "city",
+             "state", "country", "email", "business_phone"]
+SE_FIELDS = GW_FIELDS + ["sector"]
+
+def process_gw(log_id, after_id=0, on_checkpoint=None):
     log = db.session.query(Log).filter_by(id=log_id).first()
-    if not people_records:
+    if not db.session.query(People.id).first():
         log.result = "No People records found"
         log.status = "error"
         db.session.commit()
         return {"error": "No People records found"}
     
-    if not gov_people_records:
+    if not db.session.query(GovPeople.id).filter(GovPeople.removed_at.is_(None)).first():
         log.result = "No Local Government records found"
         log.status = "error"
         db.session.commit()
         return {"error": "No Local Government records found"}
 
-    n = 0
     try:
-        for record in people_records:
-            new_person_detail = search_database(record.first_name, record.last_name) 
-            print(new_person_detail)
-            person = db.session.query(People).filter(
-                        sa.func.lower(People.first_name) == record.first_name.lower(),
-                        sa.func.lower(People.last_name) == record.last_name.lower()
-                    ).first()# Searches each record against local government database
-            if new_person_detail:
-                print(new_person_detail['first_name'], new_person_detail['last_name'], "found in GovPeople database")
-                person.salutation = new_person_detail['salutation']
-                person.organization = new_person_detail['organization']
-                person.role = new_person_detail['role']
-                person.gender = new_person_detail['gender']
-                person.city = new_person_detail['city']
-                person.state = new_person_detail['state']
-                person.country = new_person_detail['country']
-                person.email = new_person_detail['email']
-                person.business_phone = new_person_detail['business_phone']
-
-                n += 1
-                log_detail = LogDetail(
-                    log_id=log_id,
-                    record_name=f'{person.first_name} {person.last_name}',
-                    status="success",
-                    source="GovPeople Database",
-                    detail=f'{new_person_detail}' 
-                )
-                db.session.add(log_detail)
-                db.session.commit()
-            else:
-                log_detail = LogDetail(
-                    log_id=log_id,
-                    record_name=f'{person.first_name} {person.last_name}',
-                    status="error",
-                    source="N/A",
-                    detail="Person not found in GovPeople database"
-                )
-                db.session.add(log_detail)
-                db.session.commit()
+        # Match all records against local government database in one pass
+        enrich_people(
+            log_id, GovPeople, GW_FIELDS,
+            source="GovPeople Database",
+            not_found_detail="Person not found in GovPeople database",
+            job_source="gw", after_id=after_id, on_checkpoint=on_checkpoint
+        )
+        db.session.refresh(log)  # counters include batches from before a resume
         log.status = "completed"
-        log.result = f"Successfully updated: {n} records, failed: {len(people_records) - n} records."
+        log.result = f"Successfully updated: {log.success_count} records, failed: {log.error_count} records."
         db.session.commit()
     except Exception as e:
         print(f"Error during scraping and updating: {e}")
-        log.status = "error"
-        log.result = str(e)
-        db.session.commit()
-
-
-    except Exception as e:
-        print(f"Error during senator update: {e}")
-        log.status = "error"
-        log.result = str(e)
-        db.session.commit()
+        db.session.rollback()
+        raise  # the job runner marks the Log and retries from the last checkpoint
 
-def process_se(log_id):
-    people_records = db.session.query(People).all()  # Fetch all records in People
-    senator_records = db.session.query(SenatorPeople).all()  # Fetch all records from Senator
+def process_se(log_id, after_id=0, on_checkpoint=None):
     log = db.session.query(Log).filter_by(id=log_id).first()
 
-    if not people_records:
+    if not db.session.query(People.id).first():
         log.result = "No People records found"
         log.status = "error"
         db.session.commit()
         return {"error": "No People records found"}
     
-    if not senator_records:
+    if not db.session.query(SenatorPeople.id).first():
         log.result = "No Senator records found"
         log.status = "error"
         db.session.commit()
         return {"error": "No Senator records found"}
 
-    n = 0
     try:
-        for record in people_records:
-            new_person_detail = search_database_for_senator(record.first_name, record.last_name)
-            person = db.session.query(People).filter(
-                sa.func.lower(People.first_name) == record.first_name.lower(),
-                sa.func.lower(People.last_name) == record.last_name.lower()
-            ).first()
-
-            if new_person_detail:
-                person.salutation = new_person_detail.get('salutation')
-                person.gender = new_person_detail.get('gender')
-                person.organization = new_person_detail.get('organization')
-                person.role = new_person_detail.get('role')
-                person.city = new_person_detail.get('city')
-                person.state = new_person_detail.get('state')
-                person.country = new_person_detail.get('country')
-                person.email = new_person_detail.get('email')
-                person.business_phone = new_person_detail.get('business_phone')
-                person.sector = new_person_detail.get("sector")
-
-                n += 1
-                log_detail = LogDetail(
-                    log_id=log_id,
-                    record_name=f'{person.first_name} {person.last_name}',
-                    status="success",
-                    source="Senator Database",
-                    detail=f'{new_person_detail}'
-                )
-                db.session.add(log_detail)
-                db.session.commit()
-            else:
-                log_detail = LogDetail(
-                    log_id=log_id,
-                    record_name=f'{person.first_name} {person.last_name}',
-                    status="error",
-                    source="N/A",
-                    detail="Person not found in Senator database"
-                )
-                db.session.add(log_detail)
-                db.session.commit()
-
-        
+        enrich_people(
+            log_id, SenatorPeople, SE_FIELDS,
+            source="Senator Database",
+            not_found_detail="Person not found in Senator database",
+            job_source="senator", after_id=after_id, on_checkpoint=on_checkpoint
+        )
+        db.session.refresh(log)
         log.status = "completed"
-        log.result = f"Successfully updated: {n} records, failed: {len(people_records) - n} records."
+        log.result = f"Successfully updated: {log.success_count} records, failed: {log.error_count} records."
         db.session.commit()
 
     except Exception as e:
         print(f"Error during senator update: {e}")
-        log.status = "error"
-        log.result = str(e)
-        db.session.commit()
+        db.session.rollback()
+        raise
 
 # limit is only for linkedin source
-def process_update_task(app, user_email, source, log_id, limit=20):
+# after_id / on_checkpoint let a job resume after the last People record it processed
+def process_update_task(app, user_email, source, log_id, limit=20, after_id=0, on_checkpoint=None):
     # Your processing / database update logic
     # Example: save CSV temporarily
     with app.app_context():
         print(f"Starting update for user: {user_email}")
-        log=db.session.get(Log, log_id)
 
         try:
             if source == "linkedin":
-                scrape_and_update_people(log_id, limit)
+                scrape_and_update_people(log_id, limit, after_id, on_checkpoint)
             elif source == "gw":
-                process_gw(log_id)
+                process_gw(log_id, after_id, on_checkpoint)
             elif source == "senator":
-                process_se(log_id)
+                process_se(log_id, after_id, on_checkpoint)
             else:
                 return jsonify({"status": "error", "error": "Invalid source"}), 400
 
             print("Update completed")
+            invalidate_count_cache()
+            publish_status(log_id)
         except Exception as e:
             print("Update failed:", str(e))
-            log.status = "error"
-            log.result = str(e)
-            db.session.commit()
-            return jsonify({"error": str(e)}), 500
+            db.session.rollback()
+            raise  # run_job marks the Log, retries and publishes the status
         
-        # Step 4: Fetch all People (or limit to updated ones if you prefer)
-        all_people = db.session.query(People).all()
-
-        # Step 5: Write CSV to memory (no temp file needed)
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([col.name for col in People.__table__.columns])  # header row
-        for p in all_people:
-            writer.writerow([getattr(p, col.name) for col in People.__table__.columns])
-
-        csv_data = output.getvalue()
-        output.close()
-
+        # Write the updated People table to CSV batch by batch
         with open("updated.csv", "w", newline='', encoding='utf-8') as f:
-            f.write(csv_data)
+            for chunk in generate_people_csv():
+                f.write(chunk)
         
 
         # TODO: Send email to user
@@ -354,34 +302,67 @@ def process_update_task(app, user_email, source, log_id, limit=20):
         # mail.send(msg)
 
 
+def run_update_job(app, job, checkpoint):
+    params = job.params or {}
+    process_update_task(app, job.user_email, job.source, job.log_id, params.get("limit", 20),
+                        after_id=job.checkpoint, on_checkpoint=checkpoint)
+
+for source in UPDATE_SOURCES:
+    register_handler(source, run_update_job)
+
+
 @ud.route("/updating/<int:log_id>")
 @login_required
 def updating(log_id):
     return render_template("updating.html", log_id=log_id, nav="workspace")
 
 
+PROGRESS_DETAILS_LIMIT = 500
+
 @ud.route("/update_progress/<int:log_id>")
 @login_required
 def update_progress(log_id):
+    """
+    Counters come from the Log row. Only LogDetail rows with id > after_id are returned,
+    pass the returned last_id as after_id on the next poll.
+    """
     log = db.session.get(Log, log_id)
     if not log:
         return jsonify({"error": "Log not found"}), 404
-    people = db.session.query(People).all()
-    details = db.session.query(LogDetail).filter_by(log_id=log_id).all()
-    total = len(people)
-    completed = sum(1 for d in details if d.status in ("success", "error"))
+    after_id = request.args.get("after_id", default=0, type=int)
+    details = db.session.query(LogDetail).filter(
+        LogDetail.log_id == log_id,
+        LogDetail.id > after_id
+    ).order_by(LogDetail.id).limit(PROGRESS_DETAILS_LIMIT).all()
     
     return jsonify({
         "status": log.status,
         "log_result": log.result,
-        "total": total,
-        "completed": completed,
+        "total": log.total,
+        "completed": log.success_count + log.error_count,
+        "success": log.success_count,
+        "error": log.error_count,
+        "last_id": details[-1].id if details else after_id,
         "details": [
-            {"record_name": d.record_name, "status": d.status, "source": d.source, "detail": d.detail}
+            {"id": d.id, "record_name": d.record_name, "status": d.status, "source": d.source, "detail": d.detail}
             for d in details
         ]
     })
 
+@ud.route("/update_events/<int:log_id>")
+@login_required
+def update_events(log_id):
+    """Server-Sent Events stream of a task's progress, see app/events.py."""
+    if not db.session.get(Log, log_id):
+        return jsonify({"error": "Log not found"}), 404
+    # EventSource sends Last-Event-ID when it reconnects
+    after_id = request.headers.get("Last-Event-ID", type=int) or request.args.get("after_id", default=0, type=int)
+    return Response(
+        stream_with_context(stream_log_events(log_id, after_id)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @ud.route("/update_complete")
 @login_required
 def update_complete():
@@ -393,7 +374,8 @@ def update_complete():
 def gov_update():
     try:
         print("Starting government database update...")
-        update_gov_database()
+        # Incremental by default, ?full=1 re-parses every page
+        update_gov_database(full=request.args.get("full") == "1")
     except Exception as e:
         print(f"Error during government database update: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -0,0 +1,202 @@
+import re
+from typing import Optional
+
+import numpy as np
+
+from app.names import make_name_key
+
+# Fuzzy name matching for records whose name_key has no exact match in a reference table.
+# Candidates are only looked up in blocks (surname sound + first initial). Given names must be
+# the same name (nicknames resolved) or an initial of it, since similar given names are usually
+# different people (John / Joan, Daniel / Danielle). Only surnames are scored with bigram
+# similarity, all at once, so a lookup costs the size of its blocks, not of the table.
+
+MIN_SCORE = 0.8          # surname similarity needed for a match
+TIE_MARGIN = 0.05        # candidates this close to the best are told apart by organisation
+PART_WEIGHT = 0.9        # a match on one part of a double-barrelled surname counts for a little less
+INITIAL_WEIGHT = 0.95    # a given name matched only by its initial counts for a little less
+
+# nickname -> the name it is short for, so "Jim Smith" finds "James Smith"
+NICKNAMES = {
+    "abby": "abigail", "alex": "alexander", "andy": "andrew", "drew": "andrew", "ben": "benjamin",
+    "bill": "william", "billy": "william", "will": "william", "liam": "william", "bob": "robert",
+    "bobby": "robert", "rob": "robert", "robbie": "robert", "bert": "robert", "cathy": "catherine",
+    "kate": "catherine", "katie": "catherine", "kathy": "catherine", "chris": "christopher",
+    "dan": "daniel", "danny": "daniel", "dave": "david", "davy": "david", "di": "diana",
+    "dick": "richard", "rick": "richard", "ricky": "richard", "rich": "richard", "ed": "edward",
+    "eddie": "edward", "ted": "edward", "ned": "edward", "fred": "frederick", "freddie": "frederick",
+    "gerry": "gerald", "greg": "gregory", "harry": "henry", "hank": "henry", "jack": "john",
+    "johnny": "john", "jon": "john", "jim": "james", "jimmy": "james", "jamie": "james",
+    "jen": "jennifer", "jenny": "jennifer", "jess": "jessica", "jo": "joanne", "joe": "joseph",
+    "joey": "joseph", "ken": "kenneth", "kenny": "kenneth", "larry": "lawrence", "liz": "elizabeth",
+    "beth": "elizabeth", "betty": "elizabeth", "lizzie": "elizabeth", "libby": "elizabeth",
+    "maggie": "margaret", "meg": "margaret", "peggy": "margaret", "matt": "matthew", "mike": "michael",
+    "mick": "michael", "mickey": "michael", "nick": "nicholas", "nicky": "nicholas", "pat": "patricia",
+    "patty": "patricia", "pete": "peter", "phil": "philip", "sam": "samuel", "sandy": "sandra",
+    "steve": "stephen", "stevie": "stephen", "sue": "susan", "suzie": "susan", "tom": "thomas",
+    "tommy": "thomas", "tony": "anthony", "vicky": "victoria", "tori": "victoria", "wally": "walter",
+    "zac": "zachary", "zach": "zachary",
+}
+
+# surname particles, never matched on their own
+PARTICLES = {"da", "de", "del", "della", "den", "der", "di", "du", "la", "le", "st", "ten", "ter", "van", "von"}
+
+_NOT_LETTERS = re.compile(r'[^a-z]')
+_SURNAME_PARTS = re.compile(r'[\s\-]+')
+_SOUNDEX = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556", "aeiouyhw")
+_ALPHABET = 27  # a-z and the word boundary
+BIGRAMS = _ALPHABET * _ALPHABET
+
+
+def soundex(word: str) -> str:
+    """American Soundex of a lowercase word, e.g. 'robert' -> 'r163'. '' when it has no letters."""
+    word = _NOT_LETTERS.sub('', word)
+    if not word:
+        return ''
+    # h and w do not separate letters with the same code, vowels do
+    digits = []
+    previous = word[0].translate(_SOUNDEX) or None
+    for letter in word[1:]:
+        if letter in 'hw':
+            continue
+        code = letter.translate(_SOUNDEX)
+        if code and code != previous:
+            digits.append(code)
+        previous = code or None
+    return (word[0] + ''.join(digits) + '000')[:4]
+
+
+def bigram_vector(word: str) -> np.ndarray:
+    """Bigram counts of a lowercase word with its boundaries, e.g. 'jo' -> ^j, jo, o$."""
+    codes = [26] + [ord(c) - 97 for c in _NOT_LETTERS.sub('', word)] + [26]
+    vector = np.zeros(BIGRAMS, dtype=np.uint8)
+    for a, b in zip(codes, codes[1:]):
+        vector[a * _ALPHABET + b] += 1
+    return vector
+
+
+class BigramMatrix:
+    """Bigram counts of many words, one row per word, to compare a word against some of the rows at once."""
+
+    def __init__(self, words):
+        self.counts = np.array([bigram_vector(w) for w in words], dtype=np.uint8).reshape(-1, BIGRAMS)
+        self.totals = self.counts.sum(axis=1, dtype=np.int32)
+
+    def dice(self, word: str, rows: np.ndarray) -> np.ndarray:
+        """Dice coefficient of the word against each of the rows, 0 to 1. Only the word's own bigrams are read."""
+        vector = bigram_vector(word)
+        columns = np.flatnonzero(vector)
+        shared = np.minimum(self.counts[np.ix_(rows, columns)], vector[columns]).sum(axis=1, dtype=np.int32)
+        return 2 * shared / (self.totals[rows] + int(vector.sum()))
+
+
+def given_name(first_name) -> str:
+    """Normalised first given name, nicknames resolved: 'Dr Jim A.' -> 'james'."""
+    tokens = make_name_key(first_name).split()
+    if not tokens:
+        return ''
+    name = _NOT_LETTERS.sub('', tokens[0])
+    return NICKNAMES.get(name, name)
+
+
+def surname_variants(last_name) -> list:
+    """
+    (variant, weight) for the whole surname and each part of a hyphenated or multi-word one:
+    'Lee-Wong' -> leewong 1.0, lee 0.9, wong 0.9
+    """
+    key = make_name_key(last_name)
+    whole = _NOT_LETTERS.sub('', key)
+    if not whole:
+        return []
+    parts = {_NOT_LETTERS.sub('', part) for part in _SURNAME_PARTS.split(key)}
+    parts = sorted(part for part in parts if len(part) > 1 and part != whole and part not in PARTICLES)
+    return [(whole, 1.0)] + [(part, PART_WEIGHT) for part in parts]
+
+
+def organisation_words(organisation) -> set:
+    return set(make_name_key(organisation).split()) if organisation else set()
+
+
+class NameIndex:
+    """
+    In-memory blocking index over a reference table's rows (dicts with first_name, last_name, organization).
+    Every row is filed under (Soundex of each surname variant, first initial); match() scores only the rows
+    in the blocks of the name looked up and returns the best one, or None.
+    """
+
+    def __init__(self, rows):
+        self.rows = []
+        self.blocks = {}     # (soundex, initial) -> list of variant numbers
+        variant_rows = []    # variant number -> row number
+        firsts, lasts, weights = [], [], []
+        for row in rows:
+            given = given_name(row.get("first_name"))
+            variants = surname_variants(row.get("last_name"))
+            if not given or not variants:
+                continue
+            number = len(self.rows)
+            self.rows.append(row)
+            for variant, weight in variants:
+                self.blocks.setdefault((soundex(variant), given[0]), []).append(len(variant_rows))
+                variant_rows.append(number)
+                firsts.append(given)
+                lasts.append(variant)
+                weights.append(weight)
+
+        self.variant_rows = np.array(variant_rows, dtype=np.int64)
+        self.firsts = np.array(firsts, dtype=object)
+        self.lasts = BigramMatrix(lasts)
+        self.last_weights = np.array(weights)
+        self.blocks = {key: np.array(numbers, dtype=np.int64) for key, numbers in self.blocks.items()}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def candidates(self, given, variants) -> np.ndarray:
+        blocks = [self.blocks.get((soundex(v), given[0])) for v, _ in variants]
+        blocks = [b for b in blocks if b is not None]
+        if not blocks:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(blocks))
+
+    def match(self, first_name, last_name, organization=None) -> Optional[tuple]:
+        """(row, score) of the best match above MIN_SCORE, or None."""
+        given = given_name(first_name)
+        variants = surname_variants(last_name)
+        if not given or not variants:
+            return None
+        candidates = self.candidates(given, variants)
+        if not len(candidates):
+            return None
+
+        # Same given name, or an initial standing for it (blocks already share the first letter)
+        firsts = self.firsts[candidates]
+        same = firsts == given
+        initial = np.array([len(first) == 1 or len(given) == 1 for first in firsts], dtype=bool)
+        first_weights = np.where(same, 1.0, np.where(initial, INITIAL_WEIGHT, 0.0))
+
+        last_scores = np.max([weight * self.lasts.dice(v, candidates) for v, weight in variants], axis=0)
+        scores = first_weights * last_scores * self.last_weights[candidates]
+
+        # Best score per row (a row has one entry per surname variant)
+        best = {}
+        for number, score in zip(self.variant_rows[candidates], scores):
+            if score >= MIN_SCORE and score > best.get(number, 0):
+                best[number] = score
+        if not best:
+            return None
+
+        # Near ties are different people: only a row sharing strictly more organisation words than
+        # every other tied row wins, otherwise the name is ambiguous and nothing is matched
+        top = max(best.values())
+        tied = [number for number, score in best.items() if score >= top - TIE_MARGIN]
+        if len(tied) > 1:
+            words = organisation_words(organization)
+            overlaps = sorted(
+                ((len(words & organisation_words(self.rows[n].get("organization"))), n) for n in tied), reverse=True
+            )
+            if overlaps[0][0] == overlaps[1][0]:
+                return None
+            tied = [overlaps[0][1]]
+        number = tied[0]
+        return self.rows[number], float(best[number])
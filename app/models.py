@@ -7,6 +7,13 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
 
+def name_key_default(context):
+    """Column default so Core inserts (e.g. CSV upload) also get a name_key."""
+    from app.names import make_name_key
+    params = context.get_current_parameters()
+    return make_name_key(params.get("first_name"), params.get("last_name"))
+
+
 class User(UserMixin,db.Model):
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     username: so.Mapped[str] = so.mapped_column(sa.String(64), index=True,
@@ -28,7 +35,15 @@ def load_user(id):
     return db.session.get(User, int(id))
 
 
+# Columns not shown to users or exported
+INTERNAL_COLUMNS = {"id", "name_key", "removed_at", "canonical_id"}
+
 class People(db.Model):
+    '''
+    canonical_id: set on rows found to duplicate an earlier row of the upload (same name_key and email
+    or organisation), the id of that row. Jobs process canonical rows (canonical_id NULL) only and copy
+    the results to their duplicates.
+    '''
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     salutation: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
     first_name: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64), index=True)
@@ -44,6 +59,12 @@ class People(db.Model):
     email: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
     sector: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
     linkedin: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
+    name_key: so.Mapped[Optional[str]] = so.mapped_column(sa.String(160), default=name_key_default)
+    canonical_id: so.Mapped[Optional[int]] = so.mapped_column(sa.Integer, index=True)
+
+    __table_args__ = (
+        sa.Index('ix_people_name_key_organization', 'name_key', 'organization'),
+    )
 
     def __repr__(self):
         return '<People {}>'.format(self.first_name or '', self.last_name or '')
@@ -52,19 +73,96 @@ class People(db.Model):
         return {
             column.name: getattr(self, column.name)
             for column in self.__table__.columns
-            if column.name != 'id'  # Exclude auto-incremented id
+            if column.name not in INTERNAL_COLUMNS  # Exclude auto-incremented id and lookup key
         }
     
+
+
+# Case-insensitive prefix filters of the people grid (paging.filter_conditions)
+sa.Index('ix_people_first_name_lower', sa.func.lower(People.first_name))
+sa.Index('ix_people_last_name_lower', sa.func.lower(People.last_name))
+sa.Index('ix_people_organization_lower', sa.func.lower(People.organization))
+
+
+class PeopleField(db.Model):
+    '''
+    Provenance of People values: when a source last confirmed a field of a record and what it found.
+    Written for the records an update job processed (canonical rows), cleared with People on upload.
+    field: People column name.
+    source: update source that wrote it ("linkedin", "gw", "senator").
+    fetched_at: when the value was read from the source.
+    value_hash: hash of the value written, to tell whether a refresh changed it.
+    '''
+    __tablename__ = "people_field"
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    people_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey("people.id", ondelete="CASCADE"))
+    field: so.Mapped[str] = so.mapped_column(sa.String(32))
+    source: so.Mapped[str] = so.mapped_column(sa.String(32))
+    fetched_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime)
+    value_hash: so.Mapped[Optional[str]] = so.mapped_column(sa.String(16))
+
+    __table_args__ = (
+        sa.UniqueConstraint('people_id', 'field', 'source', name='uq_people_field_source'),
+        sa.Index('ix_people_field_source_fetched_at', 'source', 'fetched_at'),
+    )
+
+    def __repr__(self):
+        return '<PeopleField {} {} {}>'.format(self.people_id, self.field, self.source)
+
+class LinkedInProfile(db.Model):
+    '''
+    Cache of scraped LinkedIn profiles, shared by every upload and user (app/main/scrape/helper/profile_cache.py).
+    url: canonical profile URL, https://www.linkedin.com/in/<slug>.
+    company / position / location / email: the fields parsed from the profile.
+    fetched_at: when the profile was scraped, it is served from here for LINKEDIN_PROFILE_TTL_DAYS.
+    '''
+    __tablename__ = "linkedin_profile"
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    url: so.Mapped[str] = so.mapped_column(sa.String(256), unique=True)
+    company: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
+    position: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
+    location: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
+    email: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
+    fetched_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return '<LinkedInProfile {}>'.format(self.url)
+
+class LinkedInSearch(db.Model):
+    '''
+    Cache of LinkedIn people searches (app/main/scrape/helper/search_cache.py).
+    query_key: normalised name key and organisation searched for.
+    url: first profile found, NULL when the search found none.
+    searched_at: when the search ran. Found profiles are reused for LINKEDIN_SEARCH_HIT_TTL_DAYS,
+    searches that found nothing are not repeated for LINKEDIN_SEARCH_MISS_TTL_DAYS.
+    '''
+    __tablename__ = "linkedin_search"
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    query_key: so.Mapped[str] = so.mapped_column(sa.String(256), unique=True)
+    url: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256))
+    searched_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return '<LinkedInSearch {}>'.format(self.query_key)
+
 class Log(db.Model):
     '''
     result: summary of final outcome e.g. Successfully updated 1000 records. Failed 12 records.
     status: status of this record processing (e.g., "completed", "error", or "in progress").
     created_at: when the task started.
+    total: number of records the task will process.
+    success_count / error_count: LogDetail rows written so far, by status.
     '''
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
     status: so.Mapped[Optional[str]] = so.mapped_column(sa.String(32))
     result: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
     created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.now)
+    total: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default="0")
+    success_count: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default="0")
+    error_count: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default="0")
 
     def __repr__(self):
         return '<Log {}>'.format(self.id)
@@ -79,7 +177,7 @@ class LogDetail(db.Model):
     created_at: when the task started.
     '''
     id: so.Mapped[int] = so.mapped_column(primary_key=True)
-    log_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey("log.id"))
+    log_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey("log.id"), index=True)
     record_name: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
     status: so.Mapped[Optional[str]] = so.mapped_column(sa.String(32))
     source: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128)) # source url
@@ -89,7 +187,42 @@ class LogDetail(db.Model):
     def __repr__(self):
         return '<LogDetail {}>'.format(self.id)
     
+class Job(db.Model):
+    '''
+    Queued update task, run by the worker pool in app/jobs.py.
+    source: data source of the update (e.g. "linkedin", "gw", "senator").
+    params: task options, e.g. {"limit": 20}.
+    status: "pending", "running", "completed" or "error".
+    dedup_key: source + params, an identical pending job is reused instead of queued twice.
+    checkpoint: id of the last People record processed, an interrupted job resumes after it.
+    attempts: how many times the job has been started.
+    heartbeat_at: refreshed while running, a stale heartbeat means the worker died.
+    '''
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    log_id: so.Mapped[int] = so.mapped_column(sa.Integer, sa.ForeignKey("log.id"), index=True)
+    user_email: so.Mapped[Optional[str]] = so.mapped_column(sa.String(120))
+    source: so.Mapped[str] = so.mapped_column(sa.String(32), index=True)
+    params: so.Mapped[Optional[dict]] = so.mapped_column(sa.JSON)
+    status: so.Mapped[str] = so.mapped_column(sa.String(32), index=True, default="pending")
+    dedup_key: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256), index=True)
+    checkpoint: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default="0")
+    attempts: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default="0")
+    error: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256))
+    worker: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
+    created_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.now)
+    started_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+    heartbeat_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+    finished_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+
+    def __repr__(self):
+        return '<Job {} {} {}>'.format(self.id, self.source, self.status)
+
 class IP(db.Model):  
+    '''
+    Proxy exits used by the scrapers (app/proxies.py).
+    latency: seconds of the last successful probe, failures: consecutive failed probes or requests,
+    a proxy is expired once failures reaches PROXY_MAX_FAILURES.
+    '''
     __tablename__ = "ip"
 
     id: so.Mapped[int] = so.mapped_column(sa.Integer, primary_key=True)
@@ -98,6 +231,13 @@ class IP(db.Model):
     type: so.Mapped[Optional[str]] = so.mapped_column(sa.String(32), nullable=True)
     source: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128), nullable=True)
     is_expired: so.Mapped[Optional[bool]] = so.mapped_column(sa.Boolean, default=False, nullable=False)
+    latency: so.Mapped[Optional[float]] = so.mapped_column(sa.Float)
+    failures: so.Mapped[int] = so.mapped_column(sa.Integer, default=0, server_default="0", nullable=False)
+    last_checked: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime)
+
+    __table_args__ = (
+        sa.UniqueConstraint('address', 'port', name='uq_ip_address_port'),
+    )
 
 class GovPeople(db.Model):
     __tablename__ = "gov_people"
@@ -116,6 +256,17 @@ class GovPeople(db.Model):
     mobile_phone: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
     email: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
     sector: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
+    name_key: so.Mapped[Optional[str]] = so.mapped_column(sa.String(160), default=name_key_default)
+    # Directory page the person was last scraped from
+    source_url: so.Mapped[Optional[str]] = so.mapped_column(sa.String(512))
+    # Set when no directory page lists the person any more, such rows are left out of lookups
+    removed_at: so.Mapped[Optional[datetime]] = so.mapped_column(sa.DateTime, index=True)
+
+    __table_args__ = (
+        sa.Index('ix_gov_people_name_key_organization', 'name_key', 'organization'),
+        # Natural key, scraped people are upserted on it
+        sa.Index('uq_gov_people_name_key', 'name_key', unique=True),
+    )
 
     def __repr__(self):
         return '<GovPeople {}>'.format(self.first_name or '', self.last_name or '')
@@ -124,9 +275,28 @@ class GovPeople(db.Model):
         return {
             column.name: getattr(self, column.name)
             for column in self.__table__.columns
-            if column.name != 'id'  # Exclude auto-incremented id
+            if column.name not in INTERNAL_COLUMNS  # Exclude auto-incremented id and lookup key
         }
     
+class GovPage(db.Model):
+    '''
+    State of a directory.gov.au page after the last crawl, for incremental refreshes.
+    content_hash: sha256 of the page body, the page is only parsed again when it changes.
+    links: pages it links to, as [kind, url, context, dedupe], so the crawl can continue through it unparsed.
+    name_keys: people the page lists, anyone listed by no page is tombstoned in gov_people.
+    '''
+    __tablename__ = "gov_page"
+
+    id: so.Mapped[int] = so.mapped_column(primary_key=True)
+    url: so.Mapped[str] = so.mapped_column(sa.String(512), index=True, unique=True)
+    content_hash: so.Mapped[str] = so.mapped_column(sa.String(64))
+    links: so.Mapped[Optional[list]] = so.mapped_column(sa.JSON)
+    name_keys: so.Mapped[Optional[list]] = so.mapped_column(sa.JSON)
+    crawled_at: so.Mapped[datetime] = so.mapped_column(sa.DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return '<GovPage {}>'.format(self.url)
+
 class SenatorPeople(db.Model):
     __tablename__ = "senator_people"
 
@@ -145,6 +315,11 @@ class SenatorPeople(db.Model):
     email: so.Mapped[Optional[str]] = so.mapped_column(sa.String(128))
     sector: so.Mapped[Optional[str]] = so.mapped_column(sa.String(64))
     profile_url: so.Mapped[Optional[str]] = so.mapped_column(sa.String(256))
+    name_key: so.Mapped[Optional[str]] = so.mapped_column(sa.String(160), default=name_key_default)
+
+    __table_args__ = (
+        sa.Index('ix_senator_people_name_key_organization', 'name_key', 'organization'),
+    )
 
     def __repr__(self):
         return '<SenatorPeople {}>'.format(self.first_name or '', self.last_name or '')
@@ -153,5 +328,14 @@ class SenatorPeople(db.Model):
         return {
             column.name: getattr(self, column.name)
             for column in self.__table__.columns
-            if column.name != 'id'  # Exclude auto-incremented id
-        }
\ No newline at end of file
+            if column.name not in INTERNAL_COLUMNS  # Exclude auto-incremented id and lookup key
+        }
+
+
+@sa.event.listens_for(People, "before_update")
+@sa.event.listens_for(GovPeople, "before_update")
+@sa.event.listens_for(SenatorPeople, "before_update")
+def refresh_name_key(mapper, connection, target):
+    """Keep name_key in sync when a name is edited through the ORM."""
+    from app.names import make_name_key
+    target.name_key = make_name_key(target.first_name, target.last_name)
@@ -0,0 +1,123 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.main.scrape_additional.Government.constants import PREFIXES, SUFFIXES, MALES, FEMALES
+
+# Name parsing shared by every scraper, the upload and the matchers, so they all get the same keys.
+# Tokens are compared case-insensitively without their full stops, e.g. "DR." == "Dr".
+
+_PREFIXES = {p.lower().rstrip('.') for p in PREFIXES} | {'the'}
+_MALES = {p.lower().rstrip('.') for p in MALES}
+_FEMALES = {p.lower().rstrip('.') for p in FEMALES}
+_BRACKETS = re.compile(r'\(.*?\)')
+_TOKENS = re.compile(r'[^\s,]+')
+
+NAME_CACHE_SIZE = 2 ** 16  # distinct names kept parsed
+
+
+class ParsedName(NamedTuple):
+    salutation: Optional[str]     # e.g. "The Hon. Dr"
+    first_name: str
+    last_name: str                # every token after the first, e.g. "van der Berg"
+    post_nominals: Optional[str]  # e.g. "AM PSM"
+    gender: Optional[str]         # "Male" / "Female" from the salutation
+    key: str                      # make_name_key() of the name
+
+
+def strip_diacritics(text: str) -> str:
+    """Remove accents, e.g. 'Zoë Müller' -> 'Zoe Muller'."""
+    if text.isascii():
+        return text
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def is_prefix(token: str) -> bool:
+    return token.lower().rstrip('.') in _PREFIXES
+
+
+def is_suffix(token: str) -> bool:
+    return token.replace('.', '').rstrip('-') in SUFFIXES
+
+
+def gender_of(salutations) -> Optional[str]:
+    """Gender from the last gendered salutation, e.g. "Hon. Mrs" -> "Female"."""
+    for token in reversed(salutations):
+        token = token.lower().rstrip('.')
+        if token in _MALES:
+            return "Male"
+        if token in _FEMALES:
+            return "Female"
+    return None
+
+
+@lru_cache(maxsize=NAME_CACHE_SIZE)
+def parse_name(name: str) -> ParsedName:
+    """
+    Split a full name into salutation, first name, last name and post-nominals.
+    - Drops bracketed text and commas
+    - Leading salutations (The Hon., Dr, Senator ...) and trailing post-nominals (AM, PSM ...)
+      are split off, at least one token is always kept as the name
+    - The first remaining token is the first name, the rest is the last name
+    """
+    tokens = _TOKENS.findall(_BRACKETS.sub(' ', name))
+
+    start = 0
+    while len(tokens) - start > 1 and is_prefix(tokens[start]):
+        start += 1
+    end = len(tokens)
+    while end - start > 1 and is_suffix(tokens[end - 1]):
+        end -= 1
+
+    salutations = tokens[:start]
+    names = tokens[start:end]
+    return ParsedName(
+        salutation=' '.join(salutations) or None,
+        first_name=names[0] if names else '',
+        last_name=' '.join(names[1:]),
+        post_nominals=' '.join(tokens[end:]) or None,
+        gender=gender_of(salutations),
+        key=strip_diacritics(' '.join(names)).casefold(),
+    )
+
+
+def make_name_key(first_name, last_name=None) -> str:
+    """
+    Normalised lookup key for a person's name, stored in the name_key columns.
+    - Drops bracketed text, salutations (Dr, The Hon ...) and post-nominals (AM, PSM ...)
+    - Strips diacritics, folds case and collapses whitespace
+    First and last name are joined, so "Mary Ann" + "Smith" == "Mary" + "Ann Smith",
+    and a full name on its own gets the same key as its parts.
+    """
+    return parse_name(f"{first_name or ''} {last_name or ''}").key
+
+
+def _text(values: pd.Series) -> pd.Series:
+    return values.fillna('').astype(str)
+
+
+def parse_names(names: pd.Series) -> pd.DataFrame:
+    """
+    parse_name() for a whole Series of full names: one row per name, with the ParsedName fields
+    as columns and the Series' index. Each distinct name is parsed once.
+    """
+    codes, uniques = pd.factorize(_text(names))
+    parsed = pd.DataFrame([parse_name(name) for name in uniques], columns=list(ParsedName._fields))
+    parsed = parsed.take(codes)
+    parsed.index = names.index
+    return parsed
+
+
+def name_keys(first_names: pd.Series, last_names: Optional[pd.Series] = None) -> pd.Series:
+    """make_name_key() for whole columns, e.g. name_keys(df["first_name"], df["last_name"])."""
+    full_names = _text(first_names)
+    if last_names is not None:
+        full_names = full_names + ' ' + _text(last_names)
+    codes, uniques = pd.factorize(full_names)
+    keys = np.array([parse_name(name).key for name in uniques], dtype=object)
+    return pd.Series(keys[codes], index=first_names.index, dtype=object)
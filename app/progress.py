@@ -0,0 +1,35 @@
+import sqlalchemy as sa
+from app import db
+from app.models import Log, LogDetail
+from app.events import publish_details
+
+
+def set_progress_total(log_id, total):
+    """Record how many records a task is going to process."""
+    db.session.execute(sa.update(Log).where(Log.id == log_id).values(total=total))
+    db.session.commit()
+
+
+def add_log_details(log_id, details):
+    """
+    Insert LogDetail rows (dicts with record_name, status, source, detail) for a task
+    and bump the Log success/error counters in the same commit, then publish them to subscribers.
+    """
+    if not details:
+        return
+    rows = [{"log_id": log_id, **d} for d in details]
+    ids = db.session.scalars(
+        sa.insert(LogDetail).returning(LogDetail.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+
+    success = sum(1 for d in details if d["status"] == "success")
+    error = sum(1 for d in details if d["status"] == "error")
+    db.session.execute(
+        sa.update(Log)
+        .where(Log.id == log_id)
+        .values(success_count=Log.success_count + success, error_count=Log.error_count + error)
+    )
+    db.session.commit()
+
+    publish_details(log_id, [{"id": i, **d} for i, d in zip(ids, details)])
@@ -0,0 +1,90 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from flask import current_app
+from app import db
+from app.models import People, PeopleField
+
+BATCH_SIZE = 500
+
+
+def value_hash(value) -> str:
+    """Short stable hash of a field value, None and '' hash the same."""
+    return hashlib.sha1(str(value or "").encode()).hexdigest()[:16]
+
+
+def fresh_for(source) -> timedelta:
+    """How long fields from a source stay fresh (FIELD_FRESH_DAYS), zero when they never do."""
+    days = (current_app.config.get("FIELD_FRESH_DAYS") or {}).get(source) or 0
+    return timedelta(days=days)
+
+
+def needs_refresh(source, fields, as_of):
+    """
+    Condition on People: the record does not have every one of `fields` confirmed by `source`
+    within its freshness window before `as_of`. Jobs pass their start time, so records they
+    refresh themselves still count as planned when an interrupted job resumes.
+    """
+    window = fresh_for(source)
+    if not window:
+        return sa.true()
+    fields = set(fields)
+    fresh = (
+        sa.select(PeopleField.people_id)
+        .where(
+            PeopleField.source == source,
+            PeopleField.field.in_(fields),
+            PeopleField.fetched_at >= as_of - window,
+            PeopleField.fetched_at < as_of,
+        )
+        .group_by(PeopleField.people_id)
+        .having(sa.func.count(PeopleField.id) == len(fields))
+    )
+    return People.id.not_in(fresh)
+
+
+def confirmed_since(source, fields, since):
+    """People ids (a select) with every one of `fields` confirmed by `source` at or after `since`."""
+    fields = set(fields)
+    return (
+        sa.select(PeopleField.people_id)
+        .where(PeopleField.source == source, PeopleField.field.in_(fields), PeopleField.fetched_at >= since)
+        .group_by(PeopleField.people_id)
+        .having(sa.func.count(PeopleField.id) == len(fields))
+    )
+
+
+def record_fields(source, updates, fetched_at=None):
+    """
+    Record that `source` confirmed the fields of each update mapping ({"id": people id, field: value, ...}),
+    replacing what it recorded for them before. Not committed.
+    Returns how many fields changed value since the source last confirmed them.
+    """
+    fetched_at = fetched_at or datetime.now()
+    changed = 0
+    for i in range(0, len(updates), BATCH_SIZE):
+        batch = updates[i:i + BATCH_SIZE]
+        ids = [u["id"] for u in batch]
+        fields = {field for u in batch for field in u if field != "id"}
+        previous = {
+            (row.people_id, row.field): row.value_hash
+            for row in db.session.execute(
+                sa.select(PeopleField.people_id, PeopleField.field, PeopleField.value_hash)
+                .where(PeopleField.source == source, PeopleField.people_id.in_(ids), PeopleField.field.in_(fields))
+            )
+        }
+        rows = [
+            {"people_id": u["id"], "field": field, "source": source,
+             "fetched_at": fetched_at, "value_hash": value_hash(value)}
+            for u in batch for field, value in u.items() if field != "id"
+        ]
+        changed += sum(1 for r in rows if previous.get((r["people_id"], r["field"]), r["value_hash"]) != r["value_hash"])
+
+        db.session.execute(
+            sa.delete(PeopleField)
+            .where(PeopleField.source == source, PeopleField.people_id.in_(ids), PeopleField.field.in_(fields))
+        )
+        if rows:
+            db.session.execute(sa.insert(PeopleField), rows)
+    return changed
@@ -0,0 +1,285 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import requests
+import sqlalchemy as sa
+from flask import has_app_context
+from app import db
+from app.models import IP
+
+DEFAULT_TEST_URL = "https://www.aph.gov.au/robots.txt"
+PROBE_TIMEOUT = 8        # seconds before a probe counts as failed
+PROBE_WORKERS = 32
+MAX_FAILURES = 3         # consecutive failures before a proxy is expired
+MAX_AGE = timedelta(hours=6)  # proxies not probed for this long are left out until checked again
+REQUEST_ATTEMPTS = 3     # exits tried by RotatingSession before giving up
+
+
+@dataclass
+class Proxy:
+    id: int
+    address: str
+    port: int
+    latency: float
+    failures: int = 0
+
+    @property
+    def url(self):
+        return f"http://{self.address}:{self.port}"
+
+    def requests_proxies(self):
+        return {"http": self.url, "https": self.url}
+
+    def score(self):
+        """Lower is better: probe latency, doubled for each recent failure."""
+        return self.latency * (2 ** self.failures)
+
+
+class RoundRobin:
+    """Use every healthy proxy in turn, fastest first."""
+
+    def __init__(self):
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def choose(self, proxies):
+        ranked = sorted(proxies, key=lambda p: p.score())
+        with self.lock:
+            self.position += 1
+            return ranked[self.position % len(ranked)]
+
+
+class LatencyWeighted:
+    """Pick at random, a proxy's chance is inversely proportional to its score."""
+
+    def choose(self, proxies):
+        return random.choices(proxies, weights=[1 / max(p.score(), 0.001) for p in proxies])[0]
+
+
+# PROXY_ROTATION name -> policy class, a policy has choose(proxies) -> Proxy
+ROTATION_POLICIES = {
+    "round_robin": RoundRobin,
+    "weighted": LatencyWeighted,
+}
+
+
+def register_rotation_policy(name, policy):
+    ROTATION_POLICIES[name] = policy
+
+
+class ProxyPool:
+    """
+    Healthy proxies from the IP table, held in memory for the scrapers.
+    choose() picks an exit with the rotation policy, report() feeds back how a request went:
+    failures lower a proxy's score, MAX_FAILURES in a row take it out of rotation.
+    With no policy (PROXY_ROTATION unset) the pool is disabled and callers connect directly.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy
+        self.proxies = {}  # id -> Proxy
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.policy is not None
+
+    def load(self):
+        """Read the live, recently probed proxies. Needs an app context."""
+        rows = db.session.scalars(
+            sa.select(IP).where(
+                IP.is_expired.is_(False),
+                IP.latency.isnot(None),
+                IP.last_checked >= datetime.now() - MAX_AGE,
+            )
+        ).all()
+        with self.lock:
+            self.proxies = {
+                row.id: Proxy(row.id, row.address, row.port, row.latency, row.failures) for row in rows
+            }
+            self.loaded = True
+        print(f"Proxy pool: {len(rows)} healthy proxies")
+
+    def choose(self, exclude=()):
+        """A proxy to use, or None to connect directly."""
+        if not self.enabled:
+            return None
+        with self.lock:
+            candidates = [p for p in self.proxies.values() if p.id not in exclude]
+        if not candidates:
+            return None
+        return self.policy.choose(candidates)
+
+    def report(self, proxy, ok, latency=None):
+        with self.lock:
+            if ok:
+                proxy.failures = 0
+                if latency is not None:
+                    proxy.latency = 0.8 * proxy.latency + 0.2 * latency
+            else:
+                proxy.failures += 1
+                if proxy.failures >= MAX_FAILURES:
+                    self.proxies.pop(proxy.id, None)
+                    print(f"Proxy {proxy.address}:{proxy.port} failed {proxy.failures} times, out of rotation")
+
+    def stats(self):
+        """id -> (latency, failures) of the proxies in rotation."""
+        with self.lock:
+            return {p.id: (p.latency, p.failures) for p in self.proxies.values()}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool():
+    """
+    The process-wide proxy pool, rotating with PROXY_ROTATION ("round_robin" or "weighted", unset for
+    no proxies). It is loaded from the IP table the first time it is asked for inside an app context.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            name = os.getenv("PROXY_ROTATION")
+            if name and name not in ROTATION_POLICIES:
+                raise ValueError(f"Unknown PROXY_ROTATION {name}, expected one of {', '.join(ROTATION_POLICIES)}")
+            _pool = ProxyPool(ROTATION_POLICIES[name]() if name else None)
+        pool = _pool
+    if pool.enabled and not pool.loaded and has_app_context():
+        pool.load()
+    return pool
+
+
+class RotatingSession(requests.Session):
+    """
+    requests.Session that sends each request through the next proxy of the pool and reports the outcome.
+    A request failing at the proxy (connection error, timeout, 407 or 429) is retried on another exit.
+    Requests that name their own proxies, or a disabled or empty pool, connect directly.
+    """
+
+    RETRY_STATUSES = (407, 429)
+
+    def __init__(self, pool=None, attempts=REQUEST_ATTEMPTS):
+        super().__init__()
+        self.pool = pool
+        self.attempts = attempts
+
+    def request(self, method, url, **kwargs):
+        pool = self.pool or get_proxy_pool()
+        if kwargs.get("proxies") or not pool.enabled:
+            return super().request(method, url, **kwargs)
+
+        tried = set()
+        response = None
+        for _ in range(self.attempts):
+            proxy = pool.choose(exclude=tried)
+            if proxy is None:
+                break
+            tried.add(proxy.id)
+            start = time.monotonic()
+            try:
+                response = super().request(method, url, proxies=proxy.requests_proxies(), **kwargs)
+            except (requests.exceptions.ProxyError, requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout, requests.exceptions.SSLError) as e:
+                pool.report(proxy, ok=False)
+                print(f"Proxy {proxy.address}:{proxy.port} failed for {url}: {e.__class__.__name__}")
+                continue
+            if response.status_code in self.RETRY_STATUSES:
+                pool.report(proxy, ok=False)
+                continue
+            pool.report(proxy, ok=True, latency=time.monotonic() - start)
+            return response
+
+        if response is not None:
+            return response  # every exit was throttled, hand back the last answer
+        return super().request(method, url, **kwargs)
+
+
+def probe(address, port, test_url=DEFAULT_TEST_URL, timeout=PROBE_TIMEOUT):
+    """Seconds to fetch test_url through the proxy, None when it does not work."""
+    proxy_url = f"http://{address}:{port}"
+    start = time.monotonic()
+    try:
+        response = requests.get(test_url, proxies={"http": proxy_url, "https": proxy_url}, timeout=timeout)
+    except requests.RequestException:
+        return None
+    if response.status_code >= 400:
+        return None
+    return time.monotonic() - start
+
+
+def probe_all(targets, test_url=None, timeout=PROBE_TIMEOUT, workers=PROBE_WORKERS):
+    """Probe (address, port) pairs concurrently. Returns {(address, port): latency or None}."""
+    test_url = test_url or os.getenv("PROXY_TEST_URL") or DEFAULT_TEST_URL
+    targets = list(targets)
+    if not targets:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(workers, len(targets))) as executor:
+        latencies = executor.map(lambda t: probe(t[0], t[1], test_url, timeout), targets)
+        return dict(zip(targets, latencies))
+
+
+def store_proxies(addresses, proxy_type="https", source="free-proxy-list"):
+    """
+    Add 'ip:port' strings to the IP table, one row per exit. An expired proxy that is listed
+    again gets another chance at the next check. Returns how many were new.
+    """
+    listed = set()
+    for entry in addresses:
+        address, _, port = entry.strip().rpartition(":")
+        if address and port.isdigit():
+            listed.add((address, int(port)))
+
+    existing = {(row.address, row.port): row for row in db.session.scalars(sa.select(IP)).all()}
+    new = [
+        {"address": address, "port": port, "type": proxy_type, "source": source, "is_expired": False, "failures": 0}
+        for address, port in listed if (address, port) not in existing
+    ]
+    if new:
+        db.session.execute(sa.insert(IP), new)
+    for key in listed & existing.keys():
+        if existing[key].is_expired:
+            existing[key].is_expired = False
+            existing[key].failures = 0
+    db.session.commit()
+    return len(new)
+
+
+def check_proxies(test_url=None, timeout=PROBE_TIMEOUT):
+    """
+    Probe every proxy that is not expired, all at once, and record latency, failures and last_checked.
+    Failures from the running pool are counted too. Returns (alive, expired).
+    """
+    pool = get_proxy_pool()
+    in_use = pool.stats()
+    rows = db.session.scalars(sa.select(IP).where(IP.is_expired.is_(False))).all()
+    latencies = probe_all([(row.address, row.port) for row in rows], test_url, timeout)
+
+    now = datetime.now()
+    updates = []
+    alive = expired = 0
+    for row in rows:
+        latency = latencies[(row.address, row.port)]
+        failures = max(row.failures, in_use.get(row.id, (None, 0))[1])
+        if latency is None:
+            failures += 1
+        else:
+            failures = 0
+            alive += 1
+        is_expired = failures >= MAX_FAILURES
+        expired += is_expired
+        updates.append({"id": row.id, "latency": latency if latency is not None else row.latency,
+                        "failures": failures, "last_checked": now, "is_expired": is_expired})
+    if updates:
+        db.session.bulk_update_mappings(IP, updates)
+    db.session.commit()
+
+    if pool.enabled:
+        pool.load()
+    return alive, expired
@@ -0,0 +1,68 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    Rate budget: `rate` tokens per second accumulate up to `capacity`.
+    take() blocks until a token is available, so callers sharing a bucket share its pace;
+    async code can await asyncio.sleep(reserve()) instead.
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens=1):
+        """Claim tokens now and return how many seconds the caller must wait before using them."""
+        with self.lock:
+            self.refill()
+            self.tokens -= tokens
+            return max(0, -self.tokens / self.rate)
+
+    def take(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+
+class HostLimiter:
+    """
+    One TokenBucket per host, so every thread fetching from a host shares its pace.
+    delay_for(url), when given, returns the host's Crawl-delay in seconds (or None); a host
+    asking for one gets at most one request per delay, without bursts.
+    """
+
+    def __init__(self, rate, capacity=1, delay_for=None):
+        self.rate = rate
+        self.capacity = capacity
+        self.delay_for = delay_for
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def new_bucket(self, url):
+        delay = self.delay_for(url) if self.delay_for else None
+        if delay:
+            return TokenBucket(min(self.rate, 1 / delay), 1)
+        return TokenBucket(self.rate, self.capacity)
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = self.new_bucket(url)  # may read robots.txt, outside the lock
+            with self.lock:
+                bucket = self.buckets.setdefault(host, bucket)
+        return bucket
+
+    def take(self, url):
+        self.bucket(url).take()
@@ -0,0 +1,263 @@
+"""
+Benchmark of the directory.gov.au page parsers: the previous BeautifulSoup (html.parser)
+implementation against the lxml one in gov_parser, on saved copies of real pages.
+
+Save a sample of the directory once (the listing, some organisations and their boards and sections):
+    python -m benchmarks.gov_parser save benchmarks/pages --organisations 40
+Then compare both parsers on it; outputs must be identical:
+    python -m benchmarks.gov_parser run benchmarks/pages --repeat 3
+"""
+import argparse
+import json
+import os
+import re
+import time
+from typing import Optional, List
+
+from bs4 import BeautifulSoup
+
+from app.main.scrape_additional.Government import gov_parser
+from app.main.scrape_additional.Government.constants import BASE_URL
+from app.main.scrape_additional.Government.gov_scraper import (
+    get_page, parse_organisation_page, parse_board_page, person_to_model
+)
+from app.main.scrape_additional.Government.gov_scraper_person import Person
+
+LISTING_URL = BASE_URL + "/commonwealth-entities-and-companies"
+MODEL_FIELDS = ["source_url", "salutation", "first_name", "last_name", "organization", "sector", "role",
+                "gender", "business_phone", "email", "city", "state", "country"]
+
+
+# ---- Previous BeautifulSoup parser, the baseline ----
+
+def soup_organisation_info(soup):
+    contact_info = {"phone": None, "email": None, "location": None}
+    contact_container = soup.find("div", class_="view-content container")
+    if not contact_container:
+        return contact_info
+    phone = contact_container.find("span", class_="text-phone")
+    contact_info["phone"] = phone.get_text(strip=True) if phone else None
+    email = contact_container.find("span", class_="text-email")
+    contact_info["email"] = email.get_text(strip=True) if email else None
+    location_elem = contact_container.find("div", class_="building-location")
+    if location_elem and location_elem.find("a"):
+        contact_info["location"] = location_elem.find("a").get_text(strip=True)
+    return contact_info
+
+
+def soup_people(person_element, organisation: str, location: Optional[str]) -> Person:
+    person = Person()
+    person.addOrganisation(organisation)
+    person.addLocation(location)
+    links = person_element.find_all("a")
+    if links:
+        person.addPosition(links[0].get_text(strip=True))
+        if len(links) > 1:
+            person.addName(links[1].get_text(strip=True))
+    phone_element = person_element.find('a', attrs={"data-original-title": "Phone Number"})
+    if phone_element:
+        person.addPhone(phone_element.get_text(strip=True))
+    email_element = person_element.find('a', attrs={"data-original-title": "Email"})
+    if email_element:
+        person.addEmail(email_element.get_text(strip=True))
+    return person
+
+
+def find_text(element, text: str):
+    return element.find(lambda tag: text in tag.get_text())
+
+
+def soup_boards(element, text, organisation, location, department=None) -> List[Person]:
+    people_objs = []
+    if find_text(element, text):
+        roles = element.find_all('a', href=re.compile(r"^/portfolios/"))
+        people = element.find_all('a', href=re.compile(r"^/people/"))
+        for i, person in enumerate(people):
+            person_obj = Person()
+            person_obj.addOrganisation(organisation)
+            person_obj.addDepartment(department)
+            if i < len(roles):
+                person_obj.addPosition(roles[i].text.strip())
+            person_obj.addName(person.text.strip())
+            person_obj.addLocation(location)
+            people_objs.append(person_obj)
+    return people_objs
+
+
+def soup_organisation_link(result):
+    a_tag = result.find("a")
+    if not a_tag or not a_tag["href"]:
+        return None
+    return ["organisation", BASE_URL + a_tag["href"], {"organisation": result.text.strip()}, True]
+
+
+def soup_organisation_page(content, url, organisation):
+    soup = BeautifulSoup(content, "html.parser")
+    fallback_info = soup_organisation_info(soup)
+    org_results = soup.find_all("section", class_=["views-element-container", "block-directory-custom"])
+    if not org_results:
+        return [], []
+    location = fallback_info["location"]
+    people, links = [], []
+    for org_result in org_results:
+        if find_text(org_result, "Key People"):
+            people += [person_to_model(soup_people(entry, organisation, location), fallback_info, url)
+                       for entry in org_result.find_all("li", class_="list-group-item")]
+        people += [person_to_model(p, fallback_info, url) for p in
+                   soup_boards(org_result, "Current single executive appointments", organisation, location)]
+        if find_text(org_result, "Government appointed boards"):
+            for board in org_result.find_all("li"):
+                a_tag = board.find("a")
+                if a_tag:
+                    links.append(["board", BASE_URL + a_tag["href"], {
+                        "organisation": organisation, "location": location,
+                        "fallback_info": fallback_info, "board_name": board.text.strip(),
+                    }, False])
+    section_block = soup.find("section", class_="block-directory-custom-section-block")
+    if section_block:
+        links += [link for link in map(soup_organisation_link, section_block.find_all("li", class_="list-group-item")) if link]
+    return people, links
+
+
+def soup_board_page(content, url, organisation, location, fallback_info, board_name):
+    soup = BeautifulSoup(content, "html.parser")
+    people = []
+    for board_result in soup.find_all("section", class_=["views-element-container", "block-directory-custom"]):
+        people += [person_to_model(p, fallback_info, url) for p in
+                   soup_boards(board_result, "Current board appointments", organisation, location, department=board_name)]
+    return people, []
+
+
+def soup_listing(content):
+    soup = BeautifulSoup(content, "html.parser")
+    results = soup.find_all("td", class_="views-field views-field-title")
+    return [link for link in map(soup_organisation_link, results) if link]
+
+
+SOUP_PARSERS = {"organisation": soup_organisation_page, "board": soup_board_page}
+LXML_PARSERS = {"organisation": parse_organisation_page, "board": parse_board_page}
+
+
+def model_row(model):
+    return tuple(getattr(model, f) for f in MODEL_FIELDS)
+
+
+# ---- Saving sample pages ----
+
+def save_pages(directory, organisations):
+    """Fetch the listing, the first organisations and every board and section they link to."""
+    os.makedirs(directory, exist_ok=True)
+    manifest = []
+
+    def save(kind, url, context):
+        response = get_page(url)
+        if not response:
+            return None
+        name = f"{len(manifest):04d}-{kind}.html"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(response.content)
+        manifest.append({"file": name, "kind": kind, "url": url, "context": context})
+        print(f"Saved {url}")
+        return response.content
+
+    listing = save("listing", LISTING_URL, {})
+    if listing is None:
+        raise SystemExit(f"Could not fetch {LISTING_URL}")
+
+    queue = gov_parser.listing_links(gov_parser.parse_html(listing))[:organisations]
+    seen = set()
+    while queue:
+        kind, url, context, _ = queue.pop(0)
+        if url in seen:
+            continue
+        seen.add(url)
+        content = save(kind, url, context)
+        if content is not None and kind == "organisation":
+            queue.extend(LXML_PARSERS[kind](content, url, **context)[1])
+
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Saved {len(manifest)} pages to {directory}")
+
+
+# ---- Benchmark ----
+
+def load_pages(directory):
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    for page in manifest:
+        with open(os.path.join(directory, page["file"]), "rb") as f:
+            page["content"] = f.read()
+    return manifest
+
+
+def parse_soup(page):
+    if page["kind"] == "listing":
+        return [], soup_listing(page["content"])
+    people, links = SOUP_PARSERS[page["kind"]](page["content"], page["url"], **page["context"])
+    return [model_row(p) for p in people], links
+
+
+def parse_lxml(page):
+    if page["kind"] == "listing":
+        return [], gov_parser.listing_links(gov_parser.parse_html(page["content"]))
+    people, links = LXML_PARSERS[page["kind"]](page["content"], page["url"], **page["context"])
+    return [model_row(p) for p in people], links
+
+
+def timed(parse, pages, repeat):
+    """Best of `repeat` runs: total seconds and seconds per kind of page."""
+    best_total, best_kinds = None, None
+    for _ in range(repeat):
+        kinds = {}
+        for page in pages:
+            start = time.perf_counter()
+            parse(page)
+            kinds[page["kind"]] = kinds.get(page["kind"], 0) + time.perf_counter() - start
+        total = sum(kinds.values())
+        if best_total is None or total < best_total:
+            best_total, best_kinds = total, kinds
+    return best_total, best_kinds
+
+
+def run(directory, repeat):
+    pages = load_pages(directory)
+    size = sum(len(p["content"]) for p in pages)
+    print(f"{len(pages)} pages, {size / 1024 / 1024:.1f} MB")
+
+    mismatches = 0
+    for page in pages:
+        if parse_soup(page) != parse_lxml(page):
+            mismatches += 1
+            print(f"Output differs for {page['url']} ({page['file']})")
+    if mismatches:
+        raise SystemExit(f"{mismatches} pages parsed differently")
+    print("Outputs identical on every page")
+
+    soup_total, soup_kinds = timed(parse_soup, pages, repeat)
+    lxml_total, lxml_kinds = timed(parse_lxml, pages, repeat)
+    print(f"{'pages':<14}{'BeautifulSoup':>15}{'lxml':>10}{'speedup':>10}")
+    for kind in soup_kinds:
+        print(f"{kind:<14}{soup_kinds[kind]:>14.3f}s{lxml_kinds[kind]:>9.3f}s{soup_kinds[kind] / lxml_kinds[kind]:>9.1f}x")
+    print(f"{'total':<14}{soup_total:>14.3f}s{lxml_total:>9.3f}s{soup_total / lxml_total:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    save = sub.add_parser("save", help="Save sample pages from directory.gov.au")
+    save.add_argument("directory")
+    save.add_argument("--organisations", type=int, default=40, help="Organisations to save, with their boards and sections")
+    bench = sub.add_parser("run", help="Compare the parsers on saved pages")
+    bench.add_argument("directory")
+    bench.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "save":
+        save_pages(args.directory, args.organisations)
+    else:
+        run(args.directory, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
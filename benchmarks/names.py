@@ -0,0 +1,135 @@
+"""
+Benchmark of name parsing: the previous per-row implementations (Person.addName and the
+token loops of make_name_key) against app.names on a column of synthetic names, as parsed at upload.
+
+    python -m benchmarks.names --names 100000 --distinct 20000 --repeat 3
+
+Keys must be identical: every previous key, the key of each name's first/last split and
+the vectorised keys are checked against parse_name() before anything is timed.
+"""
+import argparse
+import random
+import re
+import time
+
+import pandas as pd
+
+from app import names
+from app.main.scrape_additional.Government.constants import PREFIXES, SUFFIXES, GENDERS, MALES, FEMALES
+
+SALUTATIONS = ["", "", "", "Mr", "Ms", "Mrs", "Dr", "Dr.", "Prof", "The Hon.", "The Hon Dr", "Senator the Hon",
+               "Air Chief Marshal", "A/Prof", "Associate Professor", "Justice"]
+FIRST_NAMES = ["Mary", "John", "Zoë", "Nguyen", "Mary Ann", "Peter", "Siobhán", "Wei", "Aroha", "James",
+               "Olivia", "Mohammed", "Chloé", "Raj", "Elizabeth", "Tom"]
+LAST_NAMES = ["Smith", "van der Berg", "De La Cruz", "Müller", "O'Brien", "Nguyen", "Lee-Wong", "Singh",
+              "McClellan", "Brown", "Papadopoulos", "Te Whare", "Kaur", "Di Stefano", "Ng"]
+POST_NOMINALS = ["", "", "", "AM", "PSM", "AO", "A.M.", "OAM FAICD", "KC", "MP", "CSC-"]
+BRACKETS = ["", "", "", "", "(Acting)", "(Chair)"]
+
+
+def generate_names(count, distinct, seed=0):
+    """`count` full names drawn from `distinct` different ones, as a Series."""
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        parts = [rng.choice(SALUTATIONS), rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                 rng.choice(BRACKETS), rng.choice(POST_NOMINALS)]
+        pool.append(" ".join(p for p in parts if p))
+    return pd.Series([rng.choice(pool) for _ in range(count)])
+
+
+# ---- Previous implementations, the baseline ----
+
+_OLD_PREFIXES = {p.lower().rstrip('.') for p in PREFIXES}
+
+
+def old_name_key(first_name, last_name=None):
+    name = re.sub(r'\(.*?\)', ' ', f"{first_name or ''} {last_name or ''}")
+    tokens = name.replace(',', ' ').split()
+    while len(tokens) > 1 and (tokens[0].lower() == 'the' or tokens[0].lower().rstrip('.') in _OLD_PREFIXES):
+        tokens.pop(0)
+    while len(tokens) > 1 and tokens[-1].replace('.', '').rstrip('-') in SUFFIXES:
+        tokens.pop()
+    return names.strip_diacritics(' '.join(tokens)).casefold()
+
+
+def old_add_name(name):
+    """Person.addName: (salutation, first name, last name, gender)."""
+    salutation = fname = lname = gender = None
+    tokens = re.sub(r'\(.*?\)', '', name.strip()).replace(',', ' ').split()
+    prefix_index = -1
+    for i, token in enumerate(tokens):
+        if token in PREFIXES:
+            prefix_index = i
+    if prefix_index >= 0:
+        salutation = " ".join(tokens[:prefix_index + 1])
+        last_salutation = salutation.split()[-1]
+        if last_salutation in GENDERS:
+            gender = "Male" if last_salutation in MALES else "Female" if last_salutation in FEMALES else None
+        tokens = tokens[prefix_index + 1:]
+    while tokens and tokens[-1].rstrip('-') in SUFFIXES:
+        tokens.pop(-1)
+    if tokens:
+        fname, lname = tokens[0], " ".join(tokens[1:])
+    return salutation, fname, lname, gender
+
+
+def baseline(series):
+    """Every name split and keyed row by row, as at upload and in the scrapers before."""
+    return [(old_add_name(name), old_name_key(name)) for name in series]
+
+
+def vectorised(series):
+    names.parse_name.cache_clear()
+    return names.parse_names(series)
+
+
+def check(series):
+    parsed = vectorised(series)
+    keys = names.name_keys(parsed["first_name"], parsed["last_name"])
+    mismatches = 0
+    for name, row, split_key in zip(series, parsed.itertuples(index=False), keys):
+        expected = names.parse_name(name).key
+        if not (row.key == expected == old_name_key(name) == split_key
+                == names.make_name_key(row.first_name, row.last_name)):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"Keys differ for {name!r}")
+    if mismatches:
+        raise SystemExit(f"{mismatches} names keyed differently")
+    print("Keys identical for every name")
+
+
+def timed(fn, series, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(series)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=100000)
+    parser.add_argument("--distinct", type=int, default=20000, help="Different names among them")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    series = generate_names(args.names, args.distinct)
+    print(f"{len(series)} names, {series.nunique()} distinct")
+    check(series)
+
+    before = timed(baseline, series, args.repeat)
+    cold = timed(vectorised, series, args.repeat)
+    warm = timed(names.parse_names, series, args.repeat)
+    keys = timed(lambda s: names.name_keys(s), series, args.repeat)
+    print(f"{'previous, row by row':<28}{before:>8.3f}s")
+    print(f"{'parse_names, empty cache':<28}{cold:>8.3f}s{before / cold:>8.1f}x")
+    print(f"{'parse_names, cached':<28}{warm:>8.3f}s{before / warm:>8.1f}x")
+    print(f"{'name_keys, cached':<28}{keys:>8.3f}s{before / keys:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
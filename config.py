@@ -9,6 +9,29 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Where task progress events are published: "local" (in-process) or "database"
+    # (subscribers poll the log tables, use with several web or job worker processes)
+    PROGRESS_BROKER = os.environ.get('PROGRESS_BROKER') or 'local'
+    # Update job queue (app/jobs.py). Set JOB_EMBEDDED_WORKER=false when jobs run in a
+    # separate `flask jobs worker` process instead of threads inside the web server
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)
+    JOB_EMBEDDED_WORKER = (os.environ.get('JOB_EMBEDDED_WORKER') or 'true').lower() == 'true'
+    # Jobs of one source that may run at the same time, e.g. one LinkedIn browser per account
+    JOB_SOURCE_LIMITS = {"linkedin": 1, "gw": 1, "senator": 1}
+    JOB_HEARTBEAT_TIMEOUT = 60  # seconds without a heartbeat before a running job is resumed elsewhere
+    JOB_MAX_ATTEMPTS = 3
+    # Days a People field confirmed by a source stays fresh (app/provenance.py). Update jobs skip
+    # records whose fields from that source are all fresh, 0 re-processes every record
+    FIELD_FRESH_DAYS = {
+        "linkedin": float(os.environ.get('LINKEDIN_FRESH_DAYS') or 90),
+        "gw": float(os.environ.get('GOV_FRESH_DAYS') or 7),
+        "senator": float(os.environ.get('SENATOR_FRESH_DAYS') or 7),
+    }
+    # Days a scraped LinkedIn profile is reused instead of opening it in a browser again
+    LINKEDIN_PROFILE_TTL_DAYS = float(os.environ.get('LINKEDIN_PROFILE_TTL_DAYS') or 30)
+    # Days a LinkedIn people search is not repeated: when it found a profile, and when it found none
+    LINKEDIN_SEARCH_HIT_TTL_DAYS = float(os.environ.get('LINKEDIN_SEARCH_HIT_TTL_DAYS') or 90)
+    LINKEDIN_SEARCH_MISS_TTL_DAYS = float(os.environ.get('LINKEDIN_SEARCH_MISS_TTL_DAYS') or 14)
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -0,0 +1,72 @@
+"""Add normalised name_key columns
+
+Revision ID: e11311e80e01
+Revises: 8ed7a0336279
+Create Date: 2026-10-18 09:12:41.530217
+
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e11311e80e01'
+down_revision = '8ed7a0336279'
+branch_labels = None
+depends_on = None
+
+TABLES = ['people', 'gov_people', 'senator_people']
+
+# Frozen copy of app.names.make_name_key, so later changes to the key logic don't change this backfill
+_PREFIXES = {
+    'mr', 'mrs', 'ms', 'miss', 'dr', 'prof', 'a/prof', 'conjoint', 'associate', 'professor',
+    'wo', 'wo1', 'wo2', 'col', 'ltcol', 'brig', 'aircdre', 'majgen', 'warrant', 'officer', 'principal',
+    'air', 'chief', 'marshal', 'hon', 'justice', 'senator', 'the',
+}
+_SUFFIXES = {
+    'AC', 'AM', 'AO', 'CBE', 'CPA', 'CSC', 'CSM', 'DSC', 'FAA', 'FAHA', 'FAICD', 'FASSA', 'FTSE', 'GAICD',
+    'KC', 'NSC', 'MBE', 'MP', 'OAM', 'OLY', 'OZNM', 'PFHEA', 'PSM', 'QC', 'QSO', 'RAN', 'RANR', 'RFD', 'SC',
+}
+_BRACKETS = re.compile(r'\(.*?\)')
+_TOKENS = re.compile(r'[^\s,]+')
+
+
+def make_name_key(first_name, last_name=None):
+    tokens = _TOKENS.findall(_BRACKETS.sub(' ', f"{first_name or ''} {last_name or ''}"))
+    start = 0
+    while len(tokens) - start > 1 and tokens[start].lower().rstrip('.') in _PREFIXES:
+        start += 1
+    end = len(tokens)
+    while end - start > 1 and tokens[end - 1].replace('.', '').rstrip('-') in _SUFFIXES:
+        end -= 1
+    name = unicodedata.normalize('NFKD', ' '.join(tokens[start:end]))
+    return ''.join(c for c in name if not unicodedata.combining(c)).casefold()
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('name_key', sa.String(length=160), nullable=True))
+            batch_op.create_index(f'ix_{table}_name_key_organization', ['name_key', 'organization'], unique=False)
+
+    # Backfill keys for existing rows
+    conn = op.get_bind()
+    for table in TABLES:
+        t = sa.table(table, sa.column('id'), sa.column('first_name'),
+                     sa.column('last_name'), sa.column('name_key'))
+        rows = conn.execute(sa.select(t.c.id, t.c.first_name, t.c.last_name)).all()
+        if rows:
+            conn.execute(
+                t.update().where(t.c.id == sa.bindparam('_id')).values(name_key=sa.bindparam('_key')),
+                [{'_id': r.id, '_key': make_name_key(r.first_name, r.last_name)} for r in rows]
+            )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_name_key_organization')
+            batch_op.drop_column('name_key')
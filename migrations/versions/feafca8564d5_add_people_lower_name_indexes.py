@@ -0,0 +1,30 @@
+"""Add people lower name indexes
+
+Revision ID: feafca8564d5
+Revises: 2e8d7098ae45
+Create Date: 2026-10-18 13:41:24.759369
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'feafca8564d5'
+down_revision = '2e8d7098ae45'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = ['first_name', 'last_name', 'organization']
+
+
+def upgrade():
+    # Expression indexes for the grid's case-insensitive prefix filters, autogenerate can't compare these
+    for column in COLUMNS:
+        op.create_index(f'ix_people_{column}_lower', 'people', [sa.text(f'lower({column})')], unique=False)
+
+
+def downgrade():
+    for column in reversed(COLUMNS):
+        op.drop_index(f'ix_people_{column}_lower', table_name='people')
@@ -0,0 +1,47 @@
+import pytest
+
+from app.matching import NameIndex
+
+
+def row(first_name, last_name, organization=None):
+    return {"first_name": first_name, "last_name": last_name, "organization": organization}
+
+
+@pytest.mark.parametrize("first_name, last_name, reference", [
+    ("John", "Smith", row("Joan", "Smith")),
+    ("Danielle", "Lee", row("Daniel", "Lee")),
+    ("Karin", "Brown", row("Karen", "Brown")),
+    ("Alana", "Wong", row("Alan", "Wong")),
+])
+def test_similar_given_names_are_different_people(first_name, last_name, reference):
+    assert NameIndex([reference]).match(first_name, last_name) is None
+
+
+@pytest.mark.parametrize("first_name, last_name, reference", [
+    ("Jim", "Smith", row("James", "Smith")),
+    ("Bill", "Lee-Wong", row("William", "Wong")),
+    ("J.", "Philips", row("John", "Phillips")),
+    ("Katherine", "Johnstone", row("Katherine", "Johnston")),
+])
+def test_nicknames_initials_and_surname_spelling_match(first_name, last_name, reference):
+    match = NameIndex([reference]).match(first_name, last_name)
+    assert match is not None
+    assert match[0] is reference
+
+
+def test_near_ties_go_to_the_same_organisation():
+    rows = [row("Anne", "Phillips", "Treasury"), row("Anne", "Philipps", "Department of Health")]
+    match = NameIndex(rows).match("Anne", "Philips", "Health")
+    assert match[0] is rows[1]
+
+
+@pytest.mark.parametrize("organization", [None, "Health"])
+def test_ambiguous_initial_is_not_matched(organization):
+    rows = [row("James", "Smith", "Treasury"), row("John", "Smith", "Defence")]
+    assert NameIndex(rows).match("J", "Smith", organization) is None
+
+
+def test_initial_is_matched_by_organisation():
+    rows = [row("James", "Smith", "Treasury"), row("John", "Smith", "Department of Defence")]
+    match = NameIndex(rows).match("J", "Smith", "Defence")
+    assert match[0] is rows[1]